@@ -0,0 +1,51 @@
+"""
+Microbenchmark of selecting the behaviours kept when clipping a behaviour base to max norms
+Compares sorting a dictionary behaviour base (as before behaviour bases were arrays), a full stable sort of the fitness array, and NormsModule._assess
+Run from the repository root: python -m benchmarks.clip_behaviour_base
+"""
+import timeit
+import numpy as np
+from src.agent.norms_module import NormsModule
+from src.norm_emergence_tracker import NormEmergenceTracker
+from src.norm_table import NormTable
+
+REPEATS = 1000
+MULTIPLES = [1.1, 2, 4, 8, 16, 32]
+
+def dict_sort(behaviour_base, k):
+    return dict(sorted(behaviour_base.items(), key=lambda item: item[1]["fitness"], reverse=True)[:k])
+
+def full_sort(fitness, k):
+    return np.argsort(-fitness, kind="stable")[:k]
+
+def make_norms_module(num_behaviours, rng):
+    norms_module = NormsModule(0, NormEmergenceTracker(), NormTable())
+    while len(norms_module.norm_ids) < num_behaviours:
+        norms_module._grow()
+    #rounded fitness so that ties at the clipping threshold are common
+    norms_module.behaviours["fitness"][:num_behaviours] = np.round(rng.normal(0, 50, num_behaviours), 0)
+    norms_module.num_behaviours = num_behaviours
+    return norms_module
+
+def time_per_call(function):
+    return min(timeit.repeat(function, number=REPEATS, repeat=5)) / REPEATS * 1e6
+
+def main():
+    rng = np.random.default_rng(0)
+    k = NormsModule(0, None, None).max_norms
+    print(f"{'behaviours':>10} {'dict sort (us)':>15} {'array sort (us)':>16} {'_assess (us)':>13} {'vs dict':>8} {'vs array':>9}")
+    for multiple in MULTIPLES:
+        num_behaviours = int(multiple * k)
+        norms_module = make_norms_module(num_behaviours, rng)
+        fitness = norms_module.behaviours["fitness"][:num_behaviours]
+        behaviour_base = {i: {"reward": 0.0, "numerosity": 1, "age": 1, "fitness": f} for i, f in enumerate(fitness.tolist())}
+        expected = full_sort(fitness, k)
+        if not np.array_equal(norms_module._assess(k), expected) or list(dict_sort(behaviour_base, k)) != expected.tolist():
+            raise AssertionError("clipping selections differ for "+str(num_behaviours)+" behaviours")
+        dict_time = time_per_call(lambda: dict_sort(behaviour_base, k))
+        sort_time = time_per_call(lambda: full_sort(fitness, k))
+        assess_time = time_per_call(lambda: norms_module._assess(k))
+        print(f"{num_behaviours:>10} {dict_time:>15.1f} {sort_time:>16.1f} {assess_time:>13.1f} {dict_time/assess_time:>7.1f}x {sort_time/assess_time:>8.2f}x")
+
+if __name__ == "__main__":
+    main()
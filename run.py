@@ -1,11 +1,28 @@
 from src.scenarios.basic_harvest import BasicHarvest
 from src.scenarios.capabilities_harvest import CapabilitiesHarvest
 from src.scenarios.allotment_harvest import AllotmentHarvest
+from src.vector_harvest import VectorHarvest
+from src.harvest_model import get_latest_snapshot
+from src.agent.dqn.learner_pool import LearnerPool
+from src.parallel_runs import ParallelRuns
+from src.random_streams import RandomStreams
 from src.data_handling.data_analysis import DataAnalysis
 from src.data_handling.render_pygame import RenderPygame
-import pandas as pd
+from src.agent.dqn.numpy_network import export_checkpoints
+from src.data_handling.results_writer import merge_reports
+from src.data_handling.results_writer import export_csv_reports
+from src.data_handling.results_writer import read_report
+from src.data_handling.results_writer import exists_report
+from src.data_handling.results_writer import AGENT_REPORT_COLUMNS
+from src.data_handling.results_writer import MODEL_EPISODE_REPORT_COLUMNS
+from src.data_handling.norm_log import merge_norm_logs
+from src.data_handling.norm_log import read_norm_log
+from src.harvest_exception import FileExistsException
+from src.harvest_exception import NumEpisodesException
 import argparse
 import numpy as np
+import shutil
+import os
 
 AGENT_TYPES = ["baseline", "maximin"]
 SCENARIO_TYPES = ["capabilities", "allotment"]
@@ -13,6 +30,7 @@ NUM_AGENTS_OPTIONS = ["2", "4"]
 MAX_EPISODES = 2000
 MAX_DAYS = 50
 RUN_OPTIONS = ["current_run", "pretrained"]
+EXPORT_OPTIONS = ["checkpoints", "reports"]
 
 def generate_graphs(scenario, run_name, num_agents):
     """
@@ -24,11 +42,8 @@ def generate_graphs(scenario, run_name, num_agents):
     data_analysis = DataAnalysis(num_agents, writing_filepath)
     reading_filepath = "data/results/"+run_name+"/"+str(num_agents)+"_agents/"+scenario+"/agent_reports_"+scenario+"_"
     norms_filepath = "data/results/"+run_name+"/"+str(num_agents)+"_agents/"+scenario+"/"+scenario
-    files = [reading_filepath+"baseline.csv",reading_filepath+"maximin.csv"]
-    dfs = []
-    for file in files:
-        df = pd.read_csv(file)
-        dfs.append(df)
+    files = [reading_filepath+"baseline",reading_filepath+"maximin"]
+    dfs = data_analysis.read_reports(files)
     data_analysis.proccess_and_display_all_data(dfs, AGENT_TYPES, scenario, norms_filepath)
 
 def run_simulation(model_inst, render):
@@ -38,25 +53,126 @@ def run_simulation(model_inst, render):
         model_inst.step()
         if render:
             render_inst.render_pygame(model_inst)
+    model_inst.close()
+    if model_inst.training:
+        print(f"Mean training step: {model_inst.get_mean_train_step_time() * 1000:.3f}ms")
     num_episodes = model_inst.episode
     return num_episodes
 
-def create_and_run_model(scenario,run_name,num_agents,num_start_berries,agent_type,max_width,max_height,max_episodes,max_days,training,write_data,write_norms,render):   
-    file_string = scenario+"_"+agent_type
-    checkpoint_path = "data/model_variables/"+run_name+"/"+str(num_agents)+"_agents/"
+def create_model(scenario,num_agents,num_start_berries,agent_type,max_width,max_height,max_episodes,max_days,training,checkpoint_path,write_data,write_norms,file_string,batch_actions=False,macro_actions=False,learner_pool=None,results_path="data/results/current_run/",seed=None,resume=False):
     if scenario == "basic":
-        model_inst = BasicHarvest(num_agents,num_start_berries,agent_type,max_width,max_height,max_episodes,max_days,training,checkpoint_path,write_data,write_norms,file_string)
+        model_inst = BasicHarvest(num_agents,num_start_berries,agent_type,max_width,max_height,max_episodes,max_days,training,checkpoint_path,write_data,write_norms,file_string,batch_actions=batch_actions,macro_actions=macro_actions,learner_pool=learner_pool,results_path=results_path,seed=seed,resume=resume)
     elif scenario == "capabilities":
-        model_inst = CapabilitiesHarvest(num_agents,num_start_berries,agent_type,max_width,max_height,max_episodes,max_days,training,checkpoint_path,write_data,write_norms,file_string)
+        model_inst = CapabilitiesHarvest(num_agents,num_start_berries,agent_type,max_width,max_height,max_episodes,max_days,training,checkpoint_path,write_data,write_norms,file_string,batch_actions=batch_actions,macro_actions=macro_actions,learner_pool=learner_pool,results_path=results_path,seed=seed,resume=resume)
     elif scenario == "allotment":
-        model_inst = AllotmentHarvest(num_agents,num_start_berries,agent_type,max_width,max_height,max_episodes,max_days,training,checkpoint_path,write_data,write_norms,file_string)
+        model_inst = AllotmentHarvest(num_agents,num_start_berries,agent_type,max_width,max_height,max_episodes,max_days,training,checkpoint_path,write_data,write_norms,file_string,batch_actions=batch_actions,macro_actions=macro_actions,learner_pool=learner_pool,results_path=results_path,seed=seed,resume=resume)
     else:
         ValueError("Unknown argument: "+scenario)
+    return model_inst
+
+def create_and_run_model(scenario,run_name,num_agents,num_start_berries,agent_type,max_width,max_height,max_episodes,max_days,training,write_data,write_norms,render,batch_actions=False,macro_actions=False,checkpoint_episodes=1,checkpoint_seconds=None,num_envs=1,results_path="data/results/current_run/",seed=None,snapshot_episodes=None,resume=False):   
+    #every random stream of the run (and each copy's seed) derives from the run seed, which is reported so the run can be repeated
+    random_streams = RandomStreams(seed)
+    print("Run seed:",random_streams.seed)
+    file_string = scenario+"_"+agent_type
+    checkpoint_path = "data/model_variables/"+run_name+"/"+str(num_agents)+"_agents/"
+    if num_envs > 1:
+        #copies of the scenario stepped in lockstep, learning as one set of networks; each copy after the first writes its own results files
+        learner_pool = LearnerPool(random_streams.seed)
+        models = [create_model(scenario,num_agents,num_start_berries,agent_type,max_width,max_height,max_episodes,max_days,training,checkpoint_path,write_data,write_norms,file_string if i == 0 else file_string+"_env"+str(i),macro_actions=macro_actions,learner_pool=learner_pool,results_path=results_path,seed=random_streams.get_seed("copies",i)) for i in range(num_envs)]
+        model_inst = VectorHarvest(models, learner_pool)
+    else:
+        #snapshots are taken between episodes, which copies stepped in lockstep do not share, so only single models take them
+        snapshot_path = "data/snapshots/"+run_name+"/"+str(num_agents)+"_agents/"+file_string+"/"
+        snapshot = get_latest_snapshot(snapshot_path) if resume else None
+        model_inst = create_model(scenario,num_agents,num_start_berries,agent_type,max_width,max_height,max_episodes,max_days,training,checkpoint_path,write_data,write_norms,file_string,batch_actions=batch_actions,macro_actions=macro_actions,results_path=results_path,seed=random_streams.seed,resume=snapshot is not None)
+        if snapshot is not None:
+            print("Resuming from",snapshot)
+            model_inst.load_snapshot(snapshot)
+        model_inst.snapshot_path = snapshot_path
+        model_inst.snapshot_every_episodes = snapshot_episodes
+    model_inst.checkpoint_manager.save_every_episodes = checkpoint_episodes
+    model_inst.checkpoint_manager.save_every_seconds = checkpoint_seconds
     run_simulation(model_inst,render)
 
-def run_all(scenario,run_name,num_agents,num_start_berries,max_width,max_height,max_episodes,max_days,training,write_data,write_norms,render):
-    for agent_type in AGENT_TYPES:
-        create_and_run_model(scenario,run_name,num_agents,num_start_berries,agent_type,max_width,max_height,max_episodes,max_days,training,write_data,write_norms,render)
+def evaluate_sharded(scenario,run_name,num_agents,num_start_berries,agent_type,max_width,max_height,max_episodes,max_days,write_data,write_norms,num_shards,max_jobs=None,threads_per_job=1,batch_actions=False,macro_actions=False,results_path="data/results/current_run/",seed=None):
+    """
+    Test a configuration by splitting its episodes into shards run in separate processes, each with its own seed derived from the run seed
+    Testing does not learn, so episodes are independent; shards' results are merged in order into the files one run of all the episodes writes, with episodes renumbered
+    Each shard runs a single copy of the scenario (shards are already run side by side), and must write exactly its share of episodes for the renumbering to hold
+    """
+    file_string = scenario+"_"+agent_type
+    report_names = []
+    if write_data:
+        report_names += [("agent_reports_"+file_string, AGENT_REPORT_COLUMNS), ("model_episode_reports_"+file_string, MODEL_EPISODE_REPORT_COLUMNS)]
+    for report_name, _ in report_names:
+        if exists_report(results_path+report_name):
+            raise FileExistsException(results_path+report_name)
+    shard_sizes = [len(shard) for shard in np.array_split(np.arange(max_episodes), num_shards) if len(shard) > 0]
+    random_streams = RandomStreams(seed)
+    print("Run seed:",random_streams.seed)
+    seeds = [random_streams.get_seed("shards",shard) for shard in range(len(shard_sizes))]
+    shards_path = results_path+"shards/"+file_string+"/"
+    shutil.rmtree(shards_path, ignore_errors=True)
+    jobs = {}
+    for shard, shard_size in enumerate(shard_sizes):
+        jobs[file_string+" shard "+str(shard+1)+"/"+str(len(shard_sizes))] = dict(scenario=scenario,run_name=run_name,num_agents=num_agents,num_start_berries=num_start_berries,agent_type=agent_type,max_width=max_width,max_height=max_height,max_episodes=shard_size,max_days=max_days,training=False,write_data=write_data,write_norms=write_norms,render=False,batch_actions=batch_actions,macro_actions=macro_actions,num_envs=1,results_path=shards_path+str(shard)+"/",seed=seeds[shard])
+    ParallelRuns(max_jobs, threads_per_job).run(create_and_run_model, jobs)
+    #shard i's episodes follow the episodes of shards before it
+    episode_offsets = np.cumsum([0] + shard_sizes[:-1]).tolist()
+    shard_paths = [shards_path+str(shard)+"/" for shard in range(len(shard_sizes))]
+    for shard_path, shard_size in zip(shard_paths, shard_sizes):
+        _check_shard_episodes(shard_path, file_string, shard_size, write_data, write_norms)
+    for report_name, columns in report_names:
+        merge_reports([shard_path+report_name for shard_path in shard_paths], results_path+report_name, columns, episode_offsets)
+    if write_norms:
+        merge_norm_logs([shard_path+file_string+"_emerged_norms.jsonl" for shard_path in shard_paths], results_path+file_string+"_emerged_norms.jsonl", episode_offsets)
+    shutil.rmtree(shards_path)
+    if not os.listdir(results_path+"shards"):
+        os.rmdir(results_path+"shards")
+
+def _check_shard_episodes(shard_path, file_string, shard_size, write_data, write_norms):
+    #every file a shard wrote must hold exactly its share of episodes, or merged episodes would overlap
+    episode_counts = {}
+    if write_data:
+        episode_counts[shard_path+"model_episode_reports_"+file_string] = len(read_report(shard_path+"model_episode_reports_"+file_string))
+        episode_counts[shard_path+"agent_reports_"+file_string] = read_report(shard_path+"agent_reports_"+file_string)["episode"].nunique()
+    if write_norms:
+        episode_counts[shard_path+file_string+"_emerged_norms.jsonl"] = sum(1 for _ in read_norm_log(shard_path+file_string+"_emerged_norms.jsonl"))
+    for file_name, num_episodes in episode_counts.items():
+        if num_episodes != shard_size:
+            raise NumEpisodesException(file_name, shard_size, num_episodes)
+
+def get_dimensions(scenario, num_agents):
+    #grid width, grid height and number of berries for a society size
+    if scenario != "allotment":
+        max_width = num_agents * 2
+    else:
+        max_width = num_agents * 4
+    return max_width, num_agents * 2, num_agents * 3
+
+def run_all(scenarios,run_name,num_agents_options,agent_types,max_episodes,max_days,training,write_data,write_norms,render,batch_actions=False,macro_actions=False,checkpoint_episodes=1,checkpoint_seconds=None,num_envs=1,max_jobs=1,threads_per_job=1,num_shards=1,seed=None,snapshot_episodes=None,resume=False):
+    """
+    Run every combination of scenario, society size and agent type; each writes its results into data/results/current_run/<n>_agents/<scenario>/ (the layout graphs are generated from)
+    Runs are independent, so with more than one job they are fanned out to a pool of processes (which do not render)
+    When testing with more than one shard, each run is instead sharded by episode across the pool in turn
+    Every configuration is given the same seed, so agent types are compared on the same random streams
+    """
+    jobs = {}
+    for scenario in scenarios:
+        for num_agents in num_agents_options:
+            max_width, max_height, num_start_berries = get_dimensions(scenario, num_agents)
+            for agent_type in agent_types:
+                results_path = "data/results/current_run/"+str(num_agents)+"_agents/"+scenario+"/"
+                jobs[scenario+"_"+agent_type+"_"+str(num_agents)+"_agents"] = dict(scenario=scenario,run_name=run_name,num_agents=num_agents,num_start_berries=num_start_berries,agent_type=agent_type,max_width=max_width,max_height=max_height,max_episodes=max_episodes,max_days=max_days,training=training,write_data=write_data,write_norms=write_norms,render=render and max_jobs == 1,batch_actions=batch_actions,macro_actions=macro_actions,checkpoint_episodes=checkpoint_episodes,checkpoint_seconds=checkpoint_seconds,num_envs=num_envs,results_path=results_path,seed=seed,snapshot_episodes=snapshot_episodes,resume=resume)
+    if num_shards > 1 and not training:
+        for arguments in jobs.values():
+            evaluate_sharded(arguments["scenario"],run_name,arguments["num_agents"],arguments["num_start_berries"],arguments["agent_type"],arguments["max_width"],arguments["max_height"],max_episodes,max_days,write_data,write_norms,num_shards,max_jobs=max_jobs if max_jobs > 1 else None,threads_per_job=threads_per_job,batch_actions=batch_actions,macro_actions=macro_actions,results_path=arguments["results_path"],seed=seed)
+    elif max_jobs == 1:
+        for arguments in jobs.values():
+            create_and_run_model(**arguments)
+    else:
+        ParallelRuns(max_jobs, threads_per_job).run(create_and_run_model, jobs)
 
 def get_integer_input(prompt):
     while True:
@@ -85,63 +201,100 @@ def write_data_input(data_type):
 
 #########################################################################################
 
-parser = argparse.ArgumentParser(description="Program options")
-parser.add_argument("option", choices=["test", "train", "graphs"],
-                    help="Choose the program operation")
-args = parser.parse_args()
-
-parser = argparse.ArgumentParser(description="Program options")
-parser.add_argument("option", choices=["test", "train", "graphs"],
-                    help="Choose the program operation")
-args = parser.parse_args()
-
-if args.option not in ["test", "train", "graphs"]:
-    print("Please choose 'test', 'train', or 'graphs'.")
-elif args.option == "test" or args.option == "train":
-    if args.option == "test":
-        scenario = get_input(f"What type of scenario do you want to run {SCENARIO_TYPES}: ", f"Invalid scenario. Please choose {SCENARIO_TYPES}: ", SCENARIO_TYPES)#########################################################################################
-        run_name = get_input(f"What run do you want to test {RUN_OPTIONS}: ", f"Invalid name of run. Please choose {RUN_OPTIONS}: ", RUN_OPTIONS)
-        max_episodes = MAX_EPISODES #get_integer_input("How many episodes do you want to run: ")
-        training = False
-    else:
-        training = True
-        scenario = "basic"
-        run_name = "current_run"
-        max_episodes = 0
-    #########################################################################################
-    types = AGENT_TYPES + ["all"]
-    agent_type = get_input(f"What type of agent do you want to implement {types}: ", f"Invalid agent type. Please choose {types}: ", types)
-    #########################################################################################
-    num_agents = int(get_input(f"How many agents do you want to implement {NUM_AGENTS_OPTIONS}: ", f"Invalid number of agents. Please choose {NUM_AGENTS_OPTIONS}: ", NUM_AGENTS_OPTIONS))
-    #########################################################################################
-    write_data = write_data_input("data")
-    #########################################################################################
-    if args.option == "train":
-        print("Model variables will be written into",run_name)
-        write_norms = False
-        render = False
-    else:
-        write_norms = write_data_input("norms")
-        render = get_input("Do you want to render the simulation? (y, n): ", "Invalid choice. Please choose 'y' or 'n': ", ["y", "n"])
-        if render == "y":
-            render = True
-        elif render == "n":
+def main():
+    parser = argparse.ArgumentParser(description="Program options")
+    parser.add_argument("option", choices=["test", "train", "graphs", "export"],
+                        help="Choose the program operation")
+    parser.add_argument("--batch_actions", action="store_true",
+                        help="Choose all agents' actions in one batched decision phase per day (agents observe the start of day state)")
+    parser.add_argument("--macro_actions", action="store_true",
+                        help="Treat moving to the nearest berry as one action lasting until the berry is reached, rather than deciding again each day")
+    parser.add_argument("--num_envs", type=int, default=1,
+                        help="Step n copies of the scenario in lockstep, with one batched decision phase per day and networks shared across copies (test shards always run one copy)")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="When running more than one agent type, scenario or society size, run up to n of them at once in separate processes")
+    parser.add_argument("--threads_per_job", type=int, default=1,
+                        help="Threads TensorFlow may use in each process when running jobs at once")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="When testing, split the episodes of each run into n shards run in separate processes (up to --jobs at once, or one per core) and merge their results")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed every random stream of the run is derived from (environment, scheduling, exploration, replay sampling, network initialisation, copies and shards); fresh entropy if not given, reported so the run can be repeated")
+    parser.add_argument("--checkpoint_episodes", type=int, default=1,
+                        help="When training, save model variables every n episodes")
+    parser.add_argument("--checkpoint_seconds", type=float, default=None,
+                        help="When training, also save model variables when t seconds have passed since the last save")
+    parser.add_argument("--snapshot_episodes", type=int, default=None,
+                        help="Save a snapshot of the whole simulation (networks, optimisers, replay buffer, random generators and reports) every n episodes, keeping only the latest")
+    parser.add_argument("--resume", action="store_true",
+                        help="Resume each run from its latest snapshot if it has one, continuing its reports")
+    args = parser.parse_args()
+    if args.num_envs > 1 and (args.snapshot_episodes is not None or args.resume):
+        parser.error("snapshots are not supported with --num_envs > 1")
+
+    if args.option not in ["test", "train", "graphs", "export"]:
+        print("Please choose 'test', 'train', 'graphs', or 'export'.")
+    elif args.option == "test" or args.option == "train":
+        if args.option == "test":
+            scenario = get_input(f"What type of scenario do you want to run {SCENARIO_TYPES + ['all']}: ", f"Invalid scenario. Please choose {SCENARIO_TYPES + ['all']}: ", SCENARIO_TYPES + ["all"])#########################################################################################
+            run_name = get_input(f"What run do you want to test {RUN_OPTIONS}: ", f"Invalid name of run. Please choose {RUN_OPTIONS}: ", RUN_OPTIONS)
+            max_episodes = MAX_EPISODES #get_integer_input("How many episodes do you want to run: ")
+            training = False
+        else:
+            training = True
+            scenario = "basic"
+            run_name = "current_run"
+            max_episodes = 0
+        #########################################################################################
+        types = AGENT_TYPES + ["all"]
+        agent_type = get_input(f"What type of agent do you want to implement {types}: ", f"Invalid agent type. Please choose {types}: ", types)
+        #########################################################################################
+        num_agents = get_input(f"How many agents do you want to implement {NUM_AGENTS_OPTIONS + ['all']}: ", f"Invalid number of agents. Please choose {NUM_AGENTS_OPTIONS + ['all']}: ", NUM_AGENTS_OPTIONS + ["all"])
+        #########################################################################################
+        write_data = write_data_input("data")
+        #########################################################################################
+        if args.option == "train":
+            print("Model variables will be written into",run_name)
+            write_norms = False
             render = False
+        else:
+            write_norms = write_data_input("norms")
+            render = get_input("Do you want to render the simulation? (y, n): ", "Invalid choice. Please choose 'y' or 'n': ", ["y", "n"])
+            if render == "y":
+                render = True
+            elif render == "n":
+                render = False
+        #########################################################################################
+        scenarios = SCENARIO_TYPES if scenario == "all" else [scenario]
+        num_agents_options = [int(n) for n in NUM_AGENTS_OPTIONS] if num_agents == "all" else [int(num_agents)]
+        agent_types = AGENT_TYPES if agent_type == "all" else [agent_type]
+        if len(scenarios) * len(num_agents_options) * len(agent_types) > 1:
+            run_all(scenarios,run_name,num_agents_options,agent_types,max_episodes,MAX_DAYS,training,write_data,write_norms,render,batch_actions=args.batch_actions,macro_actions=args.macro_actions,checkpoint_episodes=args.checkpoint_episodes,checkpoint_seconds=args.checkpoint_seconds,num_envs=args.num_envs,max_jobs=args.jobs,threads_per_job=args.threads_per_job,num_shards=args.shards,seed=args.seed,snapshot_episodes=args.snapshot_episodes,resume=args.resume)
+        else:
+            num_agents = num_agents_options[0]
+            MAX_WIDTH, MAX_HEIGHT, NUM_BERRIES = get_dimensions(scenario, num_agents)
+            if args.shards > 1 and not training:
+                evaluate_sharded(scenario,run_name,num_agents,NUM_BERRIES,agent_type,MAX_WIDTH,MAX_HEIGHT,max_episodes,MAX_DAYS,write_data,write_norms,args.shards,max_jobs=args.jobs if args.jobs > 1 else None,threads_per_job=args.threads_per_job,batch_actions=args.batch_actions,macro_actions=args.macro_actions,seed=args.seed)
+            else:
+                create_and_run_model(scenario,run_name,num_agents,NUM_BERRIES,agent_type,MAX_WIDTH,MAX_HEIGHT,max_episodes,MAX_DAYS,training,write_data,write_norms,render,batch_actions=args.batch_actions,macro_actions=args.macro_actions,checkpoint_episodes=args.checkpoint_episodes,checkpoint_seconds=args.checkpoint_seconds,num_envs=args.num_envs,seed=args.seed,snapshot_episodes=args.snapshot_episodes,resume=args.resume)
     #########################################################################################
-    if scenario != "allotment":
-        MAX_WIDTH = num_agents * 2
-    else:
-        MAX_WIDTH = num_agents * 4
-    MAX_HEIGHT = num_agents * 2
-    NUM_BERRIES = num_agents * 3
-    if agent_type == "all":
-        run_all(scenario,run_name,num_agents,NUM_BERRIES,MAX_WIDTH,MAX_HEIGHT,max_episodes,MAX_DAYS,training,write_data,write_norms,render)
-    else:
-        create_and_run_model(scenario,run_name,num_agents,NUM_BERRIES,agent_type,MAX_WIDTH,MAX_HEIGHT,max_episodes,MAX_DAYS,training,write_data,write_norms,render)
-#########################################################################################
-elif args.option == "graphs":
-    run_name = get_input(f"What run do you want to generate graphs for {RUN_OPTIONS}: ", f"Invalid name of run. Please choose {RUN_OPTIONS}: ", RUN_OPTIONS)
-    scenario = get_input("What type of scenario do you want to generate graphs for (capabilities, allotment): ", "Invalid scenario. Please choose 'capabilities', or 'allotment': ", ["capabilities", "allotment"])
-    num_agents = int(get_input(f"How many agents do you want to implement {NUM_AGENTS_OPTIONS}: ", f"Invalid number of agents. Please choose {NUM_AGENTS_OPTIONS}: ", NUM_AGENTS_OPTIONS))
-    print("Graphs will be saved in data/results/current_run")
-    generate_graphs(scenario,run_name,num_agents)
\ No newline at end of file
+    elif args.option == "graphs":
+        run_name = get_input(f"What run do you want to generate graphs for {RUN_OPTIONS}: ", f"Invalid name of run. Please choose {RUN_OPTIONS}: ", RUN_OPTIONS)
+        scenario = get_input("What type of scenario do you want to generate graphs for (capabilities, allotment): ", "Invalid scenario. Please choose 'capabilities', or 'allotment': ", ["capabilities", "allotment"])
+        num_agents = int(get_input(f"How many agents do you want to implement {NUM_AGENTS_OPTIONS}: ", f"Invalid number of agents. Please choose {NUM_AGENTS_OPTIONS}: ", NUM_AGENTS_OPTIONS))
+        print("Graphs will be saved in data/results/current_run")
+        generate_graphs(scenario,run_name,num_agents)
+    #########################################################################################
+    elif args.option == "export":
+        export = get_input(f"What do you want to export {EXPORT_OPTIONS}: ", f"Invalid choice. Please choose {EXPORT_OPTIONS}: ", EXPORT_OPTIONS)
+        if export == "checkpoints":
+            run_name = get_input(f"What run do you want to export model variables for {RUN_OPTIONS}: ", f"Invalid name of run. Please choose {RUN_OPTIONS}: ", RUN_OPTIONS)
+            exported = export_checkpoints("data/model_variables/"+run_name+"/")
+            print("Exported",len(exported),"networks to .npz; testing",run_name,"will not need TensorFlow")
+        else:
+            run_name = get_input(f"What run do you want to export results for {RUN_OPTIONS}: ", f"Invalid name of run. Please choose {RUN_OPTIONS}: ", RUN_OPTIONS)
+            exported = export_csv_reports("data/results/"+run_name+"/")
+            print("Exported",len(exported),"reports to .csv in data/results/"+run_name)
+
+#processes running jobs in parallel import this file, so only run the program when it is run directly
+if __name__ == "__main__":
+    main()
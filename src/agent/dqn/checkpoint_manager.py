@@ -0,0 +1,120 @@
+import atexit
+import os
+import queue
+import threading
+import time
+import numpy as np
+from .numpy_network import get_weights_path
+from .numpy_network import save_weights
+
+class CheckpointManager:
+    """
+    Checkpoint manager snapshots network weights in memory and writes them to file on a background thread, so training does not stall on disk I/O
+    Each checkpoint is written to a temporary file and renamed into place; a final checkpoint is always written on close or at exit
+    Instance variables:
+        save_every_episodes -- write checkpoints every n episodes (None to not save by episode)
+        save_every_seconds -- write checkpoints when t seconds have passed since the last save (None to not save by time)
+        networks -- registered checkpoint paths and the networks to save to them
+        writers -- network of the same architecture per checkpoint path, owned by the writer thread to save snapshots from
+        last_save_time -- time of the last snapshot
+        pending -- queue of snapshots waiting to be written
+        thread -- background writer thread (started on the first snapshot)
+        error -- exception raised by the writer thread, raised again on flush
+        closed -- whether the final checkpoint has been written
+    """
+    def __init__(self, save_every_episodes=1, save_every_seconds=None):
+        self.save_every_episodes = save_every_episodes
+        self.save_every_seconds = save_every_seconds
+        self.networks = {}
+        self.writers = {}
+        self.last_save_time = time.monotonic()
+        self.pending = queue.Queue()
+        self.thread = None
+        self.error = None
+        self.closed = False
+        atexit.register(self.close)
+
+    def register(self, network, checkpoint_path):
+        """
+        Register a network to be saved to checkpoint path
+        """
+        #imported here so that models which only test never import TensorFlow
+        from .n_network import NNetwork
+        if self.networks.get(checkpoint_path) is network:
+            #already registered by the same agent in another copy of the scenario
+            return
+        self.networks[checkpoint_path] = network
+        writer = NNetwork(network.n_features, network.hidden_units, network.n_actions)
+        writer(np.zeros((1,)+tuple(network.n_features), dtype=np.float32))
+        self.writers[checkpoint_path] = writer
+
+    def maybe_save(self, episode):
+        """
+        Snapshot all registered networks if the episode or time cadence is due
+        """
+        due = self.save_every_episodes is not None and episode % self.save_every_episodes == 0
+        if self.save_every_seconds is not None and time.monotonic() - self.last_save_time >= self.save_every_seconds:
+            due = True
+        if due:
+            self.save()
+        return due
+
+    def save(self):
+        """
+        Snapshot the weights of all registered networks and queue them to be written
+        """
+        if not self.networks:
+            return
+        snapshot = {checkpoint_path: network.get_weights() for checkpoint_path, network in self.networks.items()}
+        self.last_save_time = time.monotonic()
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._write_snapshots, daemon=True)
+            self.thread.start()
+        self.pending.put(snapshot)
+
+    def flush(self):
+        """
+        Wait until all queued snapshots have been written
+        """
+        if self.thread is not None:
+            self.pending.join()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def close(self):
+        """
+        Write a final checkpoint, wait for all writes to finish and stop the writer thread
+        """
+        if self.closed:
+            return
+        self.closed = True
+        #a closed manager no longer needs closing at exit, so the hook should not keep it and its networks alive
+        atexit.unregister(self.close)
+        self.save()
+        if self.thread is not None:
+            self.pending.put(None)
+            self.thread.join()
+            self.thread = None
+        self.flush()
+
+    def _write_snapshots(self):
+        while True:
+            snapshot = self.pending.get()
+            try:
+                if snapshot is None:
+                    return
+                for checkpoint_path, weights in snapshot.items():
+                    self._write_checkpoint(checkpoint_path, weights)
+            except Exception as e:
+                self.error = e
+            finally:
+                self.pending.task_done()
+
+    def _write_checkpoint(self, checkpoint_path, weights):
+        writer = self.writers[checkpoint_path]
+        writer.set_weights(weights)
+        temporary_path = os.path.splitext(checkpoint_path)[0]+".tmp.keras"
+        writer.save(temporary_path)
+        os.replace(temporary_path, checkpoint_path)
+        save_weights(weights, get_weights_path(checkpoint_path))
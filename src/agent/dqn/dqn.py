@@ -1,8 +1,11 @@
 import numpy as np
 from .n_network import NNetwork
+from .replay_buffer import ReplayBuffer
+from .model_registry import model_registry
 import tensorflow as tf
 import keras
 from keras import losses
+import time
 
 class DQN:
     """
@@ -18,13 +21,17 @@ class DQN:
         n_actions -- number of possible actions (output of network)
         training -- boolean for training (learning) or testing (no learning)
         checkpoint_path -- name of path to save and load model
-        experience -- buffer for experience history; shared or individual
+        experience -- replay buffer for experience history; shared or individual
         min_experiences -- minimum number of experiences before learning can happen
         max_experiences -- maximum size of experience replay buffer
         optimiser -- learning optimiser
         delta -- parameter for Huber loss
+        huber -- Huber loss function
+        learn_step -- current step of learning, counted across every agent learning with the network
+        train_steps -- number of training steps taken
+        train_step_time -- total seconds spent in training steps (for profiling)
     """
-    def __init__(self,actions,n_features,training,checkpoint_path=None,shared_replay_buffer=None):
+    def __init__(self,actions,n_features,training,checkpoint_path=None,shared_replay_buffer=None,seed=None):
         self.gamma = 0.95
         self.lr = 0.0001
         self.total_episode_reward = 0
@@ -35,83 +42,128 @@ class DQN:
         self.n_actions = len(actions)
         self.training = training
         self.checkpoint_path = checkpoint_path
-        if shared_replay_buffer == None:
-            self.experience = {"s": [], "a": [], "r": [], "s_": [], "done": []} #experience replay buffer
-        else:
-            self.experience = shared_replay_buffer
         self.min_experiences = 100
         self.max_experiences = 100000
+        if shared_replay_buffer is None:
+            self.experience = ReplayBuffer(self.max_experiences) #experience replay buffer
+        else:
+            self.experience = shared_replay_buffer
         self.optimiser = keras.optimizers.Adam(learning_rate=self.lr)
         self.delta = 1.0
+        self.huber = losses.Huber(self.delta)
+        self.learn_step = 0
+        self.train_steps = 0
+        self.train_step_time = 0.0
         
         if self.training:
+            if seed is not None:
+                #initial weights are drawn from Keras' global seed
+                keras.utils.set_random_seed(seed)
             self.dqn = NNetwork(self.n_features,self.hidden_units, self.n_actions)
         else:
-            self.dqn = keras.models.load_model(self.checkpoint_path,compile=True)
+            self.dqn = model_registry.load(self.checkpoint_path, lambda path: keras.models.load_model(path,compile=True))
     
     def train(self, TargetNet):
         """
         Train takes a batch of random experiences, predicts Q values for them using target network, and computes loss
         """
-        if len(self.experience['s']) < self.min_experiences:
+        if len(self.experience) < self.min_experiences:
             return 0
         #get a batch of experiences
-        ids = np.random.randint(low=0, high=len(self.experience["s"]), size=self.batch_size)
-        states = np.asarray([self.experience['s'][i] for i in ids])
-        actions = np.asarray([self.experience['a'][i] for i in ids])
-        rewards = np.asarray([self.experience['r'][i] for i in ids])
-        states_next = np.asarray([self.experience['s_'][i] for i in ids])
-        dones = np.asarray([self.experience['done'][i] for i in ids])
+        states, actions, rewards, states_next, dones, steps = self.experience.sample(self.batch_size)
+        #an action lasting n days is discounted by gamma^n (semi-Markov), which is gamma for single day actions
+        discounts = np.power(self.gamma, steps).astype(np.float32)
+        if not self.optimiser.built:
+            self.optimiser.build(self.dqn.trainable_variables)
+        start = time.perf_counter()
+        loss = self._train_step(TargetNet.dqn, states, actions, rewards, states_next, dones, discounts)
+        self.train_step_time += time.perf_counter() - start
+        self.train_steps += 1
+        return loss
+
+    @tf.function(reduce_retracing=True)
+    def _train_step(self, target_dqn, states, actions, rewards, states_next, dones, discounts):
+        #traced once: target and q forward passes, loss and optimiser update run as a single graph call
         #predict q value using target net
-        value_next = np.max(TargetNet.predict(states_next), axis=1)
+        value_next = tf.math.reduce_max(target_dqn(states_next), axis=1)
         #where done, actual value is reward; if not done, actual value is discounted rewards
-        actual_values = np.where(dones, rewards, rewards+self.gamma*value_next)
-
+        actual_values = tf.where(dones, rewards, rewards+discounts*value_next)
         #gradient tape uses automatic differentiation to compute gradients of loss and records operations for back prop
         with tf.GradientTape() as tape:
             #one hot to select the action which was chosen; find predicted q value; reduce to tensor of the batch size
             selected_action_values = tf.math.reduce_sum(
-                self.predict(states) * tf.one_hot(actions, self.n_actions), axis=1) #mask logits through one hot
-            huber = losses.Huber(self.delta)
-            loss = huber(actual_values, selected_action_values)
+                self.dqn(states) * tf.one_hot(actions, self.n_actions), axis=1) #mask logits through one hot
+            loss = self.huber(actual_values, selected_action_values)
         #trainable variables are automatically watched
         variables = self.dqn.trainable_variables
         #compute gradients w.r.t. loss
         gradients = tape.gradient(loss, variables)
-        self.optimiser.apply_gradients(grads_and_vars=zip(gradients, variables))
+        self.optimiser.apply_gradients(zip(gradients, variables))
         return loss
 
-    def choose_action(self, observation, epsilon):
+    def choose_action(self, observation, epsilon, rng=np.random):
         """
-        Choose an action randomly or using network with e-greedy probability
+        Choose an action randomly or using network with e-greedy probability, exploring with the given generator
         """
-        if np.random.uniform(0,1) < epsilon:
-            a = np.random.choice(self.actions)
+        if rng.uniform(0,1) < epsilon:
+            a = rng.choice(self.actions)
             action = self.actions.index(a)
         else:
             action_values = self.predict(np.atleast_2d(observation))
             action = np.argmax(action_values)
         return action
+
+    def choose_action_from_values(self, action_values, epsilon, rng=np.random):
+        """
+        Choose an action randomly or from action values already predicted by the network with e-greedy probability (batched action selection)
+        """
+        if rng.uniform(0,1) < epsilon:
+            a = rng.choice(self.actions)
+            return self.actions.index(a)
+        return np.argmax(action_values)
     
+    def get_state(self):
+        """
+        Get the weights, optimiser variables, learning step, number of training steps and time spent in them, for a snapshot
+        """
+        return {"weights": self.dqn.get_weights(),
+                "optimiser": [v.numpy() for v in self.optimiser.variables],
+                "learn_step": self.learn_step,
+                "train_steps": self.train_steps,
+                "train_step_time": self.train_step_time}
+
+    def set_state(self, state):
+        """
+        Restore the weights, optimiser variables, learning step, number of training steps and time spent in them from a snapshot
+        """
+        self.dqn.set_weights(state["weights"])
+        if len(state["optimiser"]) > len(self.optimiser.variables):
+            #optimiser slots are only created on the first training step, so create them to restore into
+            self.optimiser.build(self.dqn.trainable_variables)
+        for variable, value in zip(self.optimiser.variables, state["optimiser"]):
+            variable.assign(value)
+        self.learn_step = state["learn_step"]
+        self.train_steps = state["train_steps"]
+        self.train_step_time = state["train_step_time"]
+
     def predict(self, inputs):
         """
         Predict runs forward pass of network and returns logits (non-normalised predictions) for actions
         Keras model by default recognises input as batch so want to have at least 2 dimensions even if a single state
         """
-        actions = self.dqn(np.atleast_2d(inputs.astype('float32')))
+        actions = self._forward(np.atleast_2d(inputs.astype('float32')))
         return actions
+
+    @tf.function(reduce_retracing=True)
+    def _forward(self, inputs):
+        #traced forward pass avoids eager Keras call overhead; batch dimension is left unspecified after the first retrace
+        return self.dqn(inputs)
     
     def add_experience(self, experience):
         """
-        Add experience to experience replay buffer
+        Add experience to experience replay buffer; once full, the oldest experience is overwritten
         """
-        #check we haven't exceeded size of replay buffer
-        if len(self.experience["s"]) >= self.max_experiences:
-            for key in self.experience.keys():
-                self.experience[key].pop(0)
-        #add experience to replay buffer
-        for key, value in experience.items():
-            self.experience[key].append(value)
+        self.experience.add(experience)
     
     def copy_weights(self, QNet):
         """
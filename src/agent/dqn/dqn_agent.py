@@ -1,6 +1,7 @@
 from mesa import Agent
 import numpy as np
-from .dqn import DQN
+from .numpy_dqn import NumpyDQN
+from .numpy_network import get_weights_path
 from abc import abstractmethod
 from src.harvest_exception import NumFeaturesException
 import os
@@ -18,16 +19,22 @@ class DQNAgent(Agent):
         n_features -- number of features in DQN (length of observation)
         done -- whether agent has finished
         shared_replay_buffer -- experience replay buffer shared amongst agents
-        learn_step -- current step of learning
-        replace_target_iter -- interval for updating weights of target network
+        replace_target_iter -- interval in learning steps of the q network for updating weights of target network
         agent_type -- baseline or maximin, for file name to saving model weights
         current_reward -- reward of current step
         training -- boolean training or testing
         q_checkpoint_path -- file path for q network (saving or loading)
         target_checkpoint_path -- file path for target network (saving or loading)
+        target_network -- target network; only loaded when first needed, so never when testing
         losses -- history of losses
+        decided_observation -- observation gathered in a batched decision phase (None if acting sequentially)
+        decided_action -- action chosen in a batched decision phase (None if acting sequentially)
+        macro_actions -- boolean whether macro actions last until they complete, rather than being chosen again each step
+        exploration_rng -- generator of the agent's exploration, from the model's random streams
+        learner_pool -- networks shared with the same agent in copies of the scenario run side by side (None if the agent has its own networks)
+        macro_action -- macro action in progress: observation and action it was chosen with, discounted reward and number of steps so far, last next state and done (None if there is none)
     """
-    def __init__(self,unique_id,model,agent_type,actions,training,checkpoint_path,epsilon,shared_replay_buffer=None):
+    def __init__(self,unique_id,model,agent_type,actions,training,checkpoint_path,epsilon,shared_replay_buffer=None,macro_actions=False,learner_pool=None):
         super().__init__(unique_id, model)
         self.epsilon = epsilon
         self.min_exploration_prob = 0.01
@@ -38,11 +45,16 @@ class DQNAgent(Agent):
         self.n_features = self.get_n_features()
         self.done = False
         self.shared_replay_buffer = shared_replay_buffer
-        self.learn_step = 0
         self.replace_target_iter = 50
         self.agent_type = agent_type
         self.current_reward = 0
         self.training = training
+        self.decided_observation = None
+        self.decided_action = None
+        self.macro_actions = macro_actions
+        self.macro_action = None
+        self.learner_pool = learner_pool
+        self.exploration_rng = model.random_streams.get_generator("exploration", unique_id)
         if self.training:
             self.q_checkpoint_path = checkpoint_path+self.agent_type+"/agent_"+str(unique_id)+"/q_model_variables.keras"
             self.target_checkpoint_path = checkpoint_path+self.agent_type+"/agent_"+str(unique_id)+"/target_model_variables.keras"
@@ -52,14 +64,20 @@ class DQNAgent(Agent):
             self.q_checkpoint_path = checkpoint_path+self.agent_type+"/agent_"+str(unique_id)+"/q_model_variables.keras"
             self.target_checkpoint_path = checkpoint_path+self.agent_type+"/agent_"+str(unique_id)+"/target_model_variables.keras"
 
-        self.q_network = DQN(self.actions,(self.n_features,),self.training,checkpoint_path=self.q_checkpoint_path,shared_replay_buffer=self.shared_replay_buffer)
-        self.target_network = DQN(self.actions,(self.n_features,),self.training,checkpoint_path=self.target_checkpoint_path,shared_replay_buffer=self.shared_replay_buffer)
+        self.q_network = self._create_network(self.q_checkpoint_path)
+        self._target_network = None
         if self.training:
             inputs = np.zeros(self.n_features)
             self.q_network.dqn(np.atleast_2d(inputs.astype('float32')))
             self.target_network.dqn(np.atleast_2d(inputs.astype('float32')))
             self.losses = list()
     
+    @property
+    def target_network(self):
+        if self._target_network is None:
+            self._target_network = self._create_network(self.target_checkpoint_path)
+        return self._target_network
+
     @abstractmethod
     def interaction_module(self):
         raise NotImplementedError
@@ -71,36 +89,131 @@ class DQNAgent(Agent):
     @abstractmethod
     def get_n_features(self):
         raise NotImplementedError
+
+    def _is_macro_action(self, action):
+        #agents with macro actions override this to say which actions last until they complete
+        return False
+
+    def _continues_macro_action(self):
+        #agents with macro actions override this to say whether the macro action in progress has yet to complete
+        return False
     
     def step(self):
         """
         Step oberves current state, chooses an action using Q network, performs action using interaction module and learns if training
+        If an action was already chosen in a batched decision phase, the observation and action from that phase are used
+        While a macro action is in progress, it is performed again without observing or choosing, and learnt from once as a whole when it completes
         """
         if self.done == False:
-            observation = self.observe()
-            if len(observation) != self.n_features:
-                raise NumFeaturesException(self.n_features, len(observation))
-            action = self.q_network.choose_action(observation,self.epsilon)
+            if self.macro_action is not None:
+                observation, action = None, self.macro_action["a"]
+            elif self.decided_action is None:
+                observation = self.observe()
+                if len(observation) != self.n_features:
+                    raise NumFeaturesException(self.n_features, len(observation))
+                action = self.q_network.choose_action(observation,self.epsilon,self.exploration_rng)
+            else:
+                observation, action = self.decided_observation, self.decided_action
+                self.decided_observation, self.decided_action = None, None
             self.current_reward, next_state, self.done = self.interaction_module(action)
-            if self.training:
+            if self.macro_actions and (self.macro_action is not None or self._is_macro_action(action)):
+                self._step_macro_action(observation, action, self.current_reward, next_state, self.done)
+            elif self.training:
                 self._learn(observation, action, self.current_reward, next_state, self.done)
                 self.epsilon = max(self.min_exploration_prob, np.exp(-self.expl_decay*self.model.episode))
             self.total_episode_reward += self.current_reward
 
-    def save_models(self):
+    def has_macro_action(self):
+        """
+        Check whether a macro action is in progress, so no action needs to be chosen for the next step
+        """
+        return self.macro_action is not None
+
+    def end_macro_action(self):
         """
-        Save q and target networks to file
+        End the macro action in progress (if any), learning from it if training
+        """
+        if self.macro_action is not None:
+            macro_action = self.macro_action
+            self.macro_action = None
+            if self.training:
+                self._learn(macro_action["s"], macro_action["a"], macro_action["r"], macro_action["s_"], macro_action["done"], macro_action["steps"])
+                self.epsilon = max(self.min_exploration_prob, np.exp(-self.expl_decay*self.model.episode))
+
+    def decide(self, observation, action):
+        """
+        Store an observation and the action chosen for it in a batched decision phase, to be performed at the next step
+        """
+        if len(observation) != self.n_features:
+            raise NumFeaturesException(self.n_features, len(observation))
+        self.decided_observation = observation
+        self.decided_action = action
+
+    def get_state(self):
         """
-        self.q_network.dqn.save(self.q_checkpoint_path)
-        self.target_network.dqn.save(self.target_checkpoint_path)
+        Get the state the agent carries between episodes (exploration, learning progress, losses and networks), for a snapshot
+        """
+        state = {"epsilon": self.epsilon,
+                 "exploration_rng": self.exploration_rng.bit_generator.state}
+        if self.training:
+            state["losses"] = self.losses
+            state["q_network"] = self.q_network.get_state()
+            state["target_network"] = self.target_network.get_state()
+        return state
+
+    def set_state(self, state):
+        """
+        Restore the state the agent carries between episodes from a snapshot
+        """
+        self.epsilon = state["epsilon"]
+        self.exploration_rng.bit_generator.state = state["exploration_rng"]
+        if self.training:
+            self.losses = state["losses"]
+            self.q_network.set_state(state["q_network"])
+            self.target_network.set_state(state["target_network"])
+
+    def register_checkpoints(self, checkpoint_manager):
+        """
+        Register q and target networks with a checkpoint manager to be saved asynchronously
+        """
+        checkpoint_manager.register(self.q_network.dqn, self.q_checkpoint_path)
+        checkpoint_manager.register(self.target_network.dqn, self.target_checkpoint_path)
+
+    def _create_network(self, checkpoint_path):
+        if self.learner_pool is not None:
+            return self.learner_pool.get_network(checkpoint_path, self._load_network)
+        return self._load_network(checkpoint_path)
+
+    def _load_network(self, checkpoint_path):
+        #when testing, use exported NumPy weights if available so that TensorFlow is never imported
+        weights_path = get_weights_path(checkpoint_path)
+        if not self.training and os.path.exists(weights_path):
+            return NumpyDQN(self.actions,weights_path)
+        from .dqn import DQN
+        #q and target networks of each agent are initialised from their own seeds
+        seed = self.model.random_streams.get_seed("tensorflow", self.unique_id, int(checkpoint_path == self.target_checkpoint_path))
+        return DQN(self.actions,(self.n_features,),self.training,checkpoint_path=checkpoint_path,shared_replay_buffer=self.shared_replay_buffer,seed=seed)
     
-    def _learn(self, observation, action, reward, next_state, done):
-        experience = {"s":observation, "a":action, "r":reward, "s_":next_state, "done":done}
+    def _step_macro_action(self, observation, action, reward, next_state, done):
+        #semi-Markov experience: rewards of each step are discounted from the step the macro action was chosen at
+        if self.macro_action is None:
+            self.macro_action = {"s":observation, "a":action, "r":0, "steps":0}
+        if self.training:
+            self.macro_action["r"] += self.q_network.gamma ** self.macro_action["steps"] * reward
+        self.macro_action["steps"] += 1
+        self.macro_action["s_"] = next_state
+        self.macro_action["done"] = done
+        if done or not self._continues_macro_action():
+            self.end_macro_action()
+
+    def _learn(self, observation, action, reward, next_state, done, steps=1):
+        experience = {"s":observation, "a":action, "r":reward, "s_":next_state, "done":done, "steps":steps}
         self.q_network.add_experience(experience)
         loss = self.q_network.train(self.target_network)
         self._append_losses(loss)
-        self.learn_step += 1
-        if self.learn_step % self.replace_target_iter == 0:
+        #counted on the q network, so agents sharing it in copies update the target once every replace_target_iter steps between them
+        self.q_network.learn_step += 1
+        if self.q_network.learn_step % self.replace_target_iter == 0:
             self.target_network.copy_weights(self.q_network)
     
     def _append_losses(self, loss):
@@ -0,0 +1,29 @@
+from .replay_buffer import ReplayBuffer
+from .checkpoint_manager import CheckpointManager
+from src.random_streams import RandomStreams
+
+class LearnerPool:
+    """
+    Learner pool shares learning between copies of a scenario run side by side
+    Agents with the same checkpoint path (the same agent in each copy) share one q network and one target network, and every agent of every copy adds to one replay buffer
+    Learning steps are counted on each shared q network, so its target network is updated at the same interval in training steps as in a single run
+    Networks are saved by one checkpoint manager for all copies
+    Instance variables:
+        replay_buffer -- replay buffer shared by every agent of every copy
+        checkpoint_manager -- writes the shared networks to file in the background during training
+        networks -- network for each checkpoint path
+    """
+    def __init__(self, seed=None):
+        self.replay_buffer = ReplayBuffer(rng=RandomStreams(seed).get_generator("replay"))
+        self.checkpoint_manager = CheckpointManager()
+        self.networks = {}
+
+    def get_network(self, checkpoint_path, create):
+        """
+        Get the network for a checkpoint path, calling create(checkpoint_path) only for the first agent to ask for it
+        """
+        network = self.networks.get(checkpoint_path)
+        if network is None:
+            network = create(checkpoint_path)
+            self.networks[checkpoint_path] = network
+        return network
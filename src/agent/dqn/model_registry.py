@@ -0,0 +1,30 @@
+import os
+
+class ModelRegistry:
+    """
+    Model registry loads each checkpoint at most once per process and shares the loaded network between agents and runs
+    Networks from the registry are only used for testing, so they are shared read-only
+    Instance variables:
+        models -- loaded networks keyed by absolute checkpoint path and modification time
+    """
+    def __init__(self):
+        self.models = {}
+
+    def load(self, checkpoint_path, loader):
+        """
+        Get the network for a checkpoint, calling loader(checkpoint_path) only if it has not been loaded (or has changed on disk)
+        """
+        key = (os.path.abspath(checkpoint_path), os.path.getmtime(checkpoint_path))
+        model = self.models.get(key)
+        if model is None:
+            model = loader(checkpoint_path)
+            self.models[key] = model
+        return model
+
+    def clear(self):
+        """
+        Release all loaded networks
+        """
+        self.models = {}
+
+model_registry = ModelRegistry()
@@ -0,0 +1,47 @@
+import numpy as np
+from .numpy_network import NumpyNetwork
+from .model_registry import model_registry
+
+class NumpyDQN:
+    """
+    NumPy DQN chooses actions from a pretrained network exported to .npz, so testing does not need TensorFlow; it cannot learn
+    Instance variables:
+        actions -- possible actions
+        n_actions -- number of possible actions (output of network)
+        training -- always False
+        checkpoint_path -- path of the .npz weights
+        dqn -- NumPy forward pass of the network (shared read-only with other agents loading the same weights)
+    """
+    def __init__(self,actions,checkpoint_path):
+        self.actions = actions
+        self.n_actions = len(actions)
+        self.training = False
+        self.checkpoint_path = checkpoint_path
+        self.dqn = model_registry.load(self.checkpoint_path, NumpyNetwork)
+
+    def choose_action(self, observation, epsilon, rng=np.random):
+        """
+        Choose an action randomly or using network with e-greedy probability, exploring with the given generator
+        """
+        if rng.uniform(0,1) < epsilon:
+            a = rng.choice(self.actions)
+            action = self.actions.index(a)
+        else:
+            action_values = self.predict(np.atleast_2d(observation))
+            action = np.argmax(action_values)
+        return action
+
+    def choose_action_from_values(self, action_values, epsilon, rng=np.random):
+        """
+        Choose an action randomly or from action values already predicted by the network with e-greedy probability (batched action selection)
+        """
+        if rng.uniform(0,1) < epsilon:
+            a = rng.choice(self.actions)
+            return self.actions.index(a)
+        return np.argmax(action_values)
+
+    def predict(self, inputs):
+        """
+        Predict runs forward pass of network and returns logits (non-normalised predictions) for actions
+        """
+        return self.dqn(inputs)
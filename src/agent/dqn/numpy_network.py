@@ -0,0 +1,62 @@
+import numpy as np
+import os
+
+class NumpyNetwork:
+    """
+    NumPy network runs the forward pass of a trained NNetwork (Dense-ReLU-Dense-ReLU-Dense) from exported weights, without TensorFlow
+    Instance variables:
+        weights_path -- path of the .npz file the weights were loaded from
+        kernels -- weight matrix of each dense layer
+        biases -- bias vector of each dense layer
+        n_actions -- number of possible actions (size of output)
+    """
+    def __init__(self, weights_path):
+        self.weights_path = weights_path
+        with np.load(weights_path) as weights:
+            n_layers = len([name for name in weights.files if name.startswith("kernel_")])
+            self.kernels = [weights["kernel_"+str(i)].astype(np.float32) for i in range(n_layers)]
+            self.biases = [weights["bias_"+str(i)].astype(np.float32) for i in range(n_layers)]
+        for array in self.kernels + self.biases:
+            array.flags.writeable = False
+        self.n_actions = self.biases[-1].shape[0]
+
+    def __call__(self, inputs):
+        z = np.atleast_2d(inputs).astype(np.float32)
+        for kernel, bias in zip(self.kernels[:-1], self.biases[:-1]):
+            z = np.maximum(z @ kernel + bias, 0)
+        return z @ self.kernels[-1] + self.biases[-1]
+
+def get_weights_path(checkpoint_path):
+    """
+    Get the .npz weights path that sits alongside a .keras checkpoint
+    """
+    return os.path.splitext(checkpoint_path)[0]+".npz"
+
+def save_weights(weights, weights_path):
+    """
+    Write dense layer weights (as returned by get_weights of a Keras network) to a compressed .npz; written to a temporary file and renamed so readers never see a partial file
+    """
+    arrays = {}
+    for i in range(len(weights) // 2):
+        arrays["kernel_"+str(i)] = weights[2*i].astype(np.float32)
+        arrays["bias_"+str(i)] = weights[2*i+1].astype(np.float32)
+    temporary_path = weights_path+".tmp"
+    with open(temporary_path, "wb") as file:
+        np.savez_compressed(file, **arrays)
+    os.replace(temporary_path, weights_path)
+
+def export_checkpoints(directory):
+    """
+    Export every .keras checkpoint under a directory to a .npz alongside it; requires TensorFlow
+    """
+    import keras
+    from .n_network import NNetwork
+    exported = []
+    for root, _, files in os.walk(directory):
+        for file in sorted(files):
+            if file.endswith(".keras"):
+                checkpoint_path = os.path.join(root, file)
+                model = keras.models.load_model(checkpoint_path, custom_objects={"NNetwork": NNetwork}, compile=False)
+                save_weights(model.get_weights(), get_weights_path(checkpoint_path))
+                exported.append(checkpoint_path)
+    return exported
@@ -0,0 +1,92 @@
+import numpy as np
+import os
+
+REPLAY_ARRAYS = ("states", "actions", "rewards", "states_next", "dones", "steps")
+
+class ReplayBuffer:
+    """
+    Replay buffer stores experiences in preallocated arrays and overwrites the oldest experience once full (ring buffer)
+    Arrays are allocated on the first experience added, once the length of an observation is known
+    Instance variables:
+        max_experiences -- maximum number of experiences held
+        size -- number of experiences currently held
+        cursor -- index the next experience is written to
+        states -- observations before acting
+        actions -- indices of actions taken
+        rewards -- rewards received
+        states_next -- observations after acting
+        dones -- whether the agent finished after acting
+        rng -- generator batches are sampled with
+        steps -- number of days the action lasted (1 unless it was a macro action)
+    """
+    def __init__(self, max_experiences=100000, rng=None):
+        self.max_experiences = max_experiences
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.size = 0
+        self.cursor = 0
+        self.states = None
+        self.actions = None
+        self.rewards = None
+        self.states_next = None
+        self.dones = None
+        self.steps = None
+
+    def __len__(self):
+        return self.size
+
+    def add(self, experience):
+        """
+        Add experience dictionary ("s", "a", "r", "s_", "done", and optionally "steps") at the cursor in O(1), overwriting the oldest experience if full
+        """
+        if self.states is None:
+            self._allocate(len(experience["s"]))
+        i = self.cursor
+        self.states[i] = experience["s"]
+        self.actions[i] = experience["a"]
+        self.rewards[i] = experience["r"]
+        self.states_next[i] = experience["s_"]
+        self.dones[i] = experience["done"]
+        self.steps[i] = experience.get("steps", 1)
+        self.cursor = (self.cursor + 1) % self.max_experiences
+        self.size = min(self.size + 1, self.max_experiences)
+
+    def sample(self, batch_size):
+        """
+        Sample a batch of experiences uniformly with replacement; returns states, actions, rewards, next states, dones, steps
+        """
+        ids = self.rng.integers(low=0, high=self.size, size=batch_size)
+        return self.states[ids], self.actions[ids], self.rewards[ids], self.states_next[ids], self.dones[ids], self.steps[ids]
+
+    def save(self, directory):
+        """
+        Write the experiences held to memory-mapped .npy files in directory; returns the rest of the buffer's state (size, cursor and generator state)
+        """
+        if self.states is not None:
+            for name in REPLAY_ARRAYS:
+                array = getattr(self, name)[:self.size]
+                file = np.lib.format.open_memmap(os.path.join(directory, name+".npy"), mode="w+", dtype=array.dtype, shape=array.shape)
+                file[:] = array
+                file.flush()
+                del file
+        return {"size": self.size, "cursor": self.cursor, "rng": self.rng.bit_generator.state}
+
+    def load(self, directory, state):
+        """
+        Restore experiences written by save, reading them through memory maps into the buffer's arrays
+        """
+        self.size = state["size"]
+        self.cursor = state["cursor"]
+        self.rng.bit_generator.state = state["rng"]
+        if self.size > 0:
+            files = {name: np.load(os.path.join(directory, name+".npy"), mmap_mode="r") for name in REPLAY_ARRAYS}
+            self._allocate(files["states"].shape[1])
+            for name, file in files.items():
+                getattr(self, name)[:self.size] = file
+
+    def _allocate(self, n_features):
+        self.states = np.zeros((self.max_experiences, n_features), dtype=np.float32)
+        self.actions = np.zeros(self.max_experiences, dtype=np.int32)
+        self.rewards = np.zeros(self.max_experiences, dtype=np.float32)
+        self.states_next = np.zeros((self.max_experiences, n_features), dtype=np.float32)
+        self.dones = np.zeros(self.max_experiences, dtype=bool)
+        self.steps = np.ones(self.max_experiences, dtype=np.int32)
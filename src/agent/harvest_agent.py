@@ -4,6 +4,7 @@ from .norms_module import NormsModule
 from .ethics_module import EthicsModule
 from src.harvest_exception import NumFeaturesException
 from src.harvest_exception import AgentTypeException
+from src.agent_state import AgentStateColumn
 import numpy as np
 
 class HarvestAgent(DQNAgent):
@@ -32,11 +33,19 @@ class HarvestAgent(DQNAgent):
         rewards -- dictionary of rewards received
         off_grid -- status of agent on the grid; agent is removed from the grid upon death
         current_action -- the current action being performed
+    With macro actions, move lasts until the agent forages the berry it is moving to (or the berry is gone), rather than one step along the path
+    health, berries, days_left_to_live, done and off_grid are views into the model's agent state
     """
-    def __init__(self,unique_id,model,agent_type,max_days,min_width,max_width,min_height,max_height,training,checkpoint_path,epsilon,write_norms,shared_replay_buffer=None):
+    health = AgentStateColumn("health")
+    berries = AgentStateColumn("berries")
+    days_left_to_live = AgentStateColumn("days_left_to_live")
+    done = AgentStateColumn("done")
+    off_grid = AgentStateColumn("off_grid")
+
+    def __init__(self,unique_id,model,agent_type,max_days,min_width,max_width,min_height,max_height,training,checkpoint_path,epsilon,write_norms,shared_replay_buffer=None,macro_actions=False,learner_pool=None):
         self.actions = self._generate_actions(unique_id, model.get_num_agents())
         #dqn agent class handles learning and action selection
-        super().__init__(unique_id,model,agent_type,self.actions,training,checkpoint_path,epsilon,shared_replay_buffer=shared_replay_buffer)
+        super().__init__(unique_id,model,agent_type,self.actions,training,checkpoint_path,epsilon,shared_replay_buffer=shared_replay_buffer,macro_actions=macro_actions,learner_pool=learner_pool)
         self.start_health = 0.8
         self.health = self.start_health
         self.berries = 0
@@ -56,10 +65,10 @@ class HarvestAgent(DQNAgent):
         self.agent_type = agent_type
         self.write_norms = write_norms
         self.moving_module = MovingModule(self.unique_id, model, training, min_width, max_width, min_height, max_height)
-        self.norms_module = NormsModule(self.unique_id)
+        self.norms_module = NormsModule(self.unique_id, model.norm_tracker, model.norm_table)
         if agent_type != "baseline":
             self.rewards = self._ethics_rewards()
-            self.ethics_module = EthicsModule(self.rewards["sanction"])
+            self.ethics_module = EthicsModule(self.rewards["sanction"], model.agent_state.well_being)
         else:
             self.rewards = self._baseline_rewards()
         self.off_grid = False
@@ -76,12 +85,12 @@ class HarvestAgent(DQNAgent):
         """
         done = False
         self.current_action = action
-        society_well_being = self.model.get_society_well_being(self, True)
         if self.write_norms:
+            society_well_being = self.model.get_society_well_being(self, True)
             antecedent = self.norms_module.get_antecedent(self.berries, self.health, society_well_being)
         if self.agent_type != "baseline":
             self.ethics_module.day = self.model.get_day()
-            can_help = self._update_ethics(society_well_being)
+            can_help = self._update_ethics()
         reward = self._perform_action(action)
         next_state = self.observe()
         if self.agent_type != "baseline":
@@ -115,6 +124,7 @@ class HarvestAgent(DQNAgent):
         """
         Reset agent for new episode
         """
+        self.end_macro_action()
         self.done = False
         self.total_episode_reward = 0
         self.berries = 0
@@ -126,7 +136,7 @@ class HarvestAgent(DQNAgent):
         self.days_left_to_live = self.get_days_left_to_live()
         self.total_days_left_to_live = self.days_left_to_live
         self.days_survived = 0
-        self.norms_module.behaviour_base  = {}
+        self.norms_module.clear()
         self.moving_module.reset()
 
     def get_days_left_to_live(self):
@@ -139,6 +149,12 @@ class HarvestAgent(DQNAgent):
             return 0
         return days_left_to_live
     
+    def _is_macro_action(self, action):
+        return self.actions[action] == "move"
+
+    def _continues_macro_action(self):
+        return self.moving_module.is_moving_to_berry()
+
     def _generate_actions(self, unique_id, num_agents):
         actions = ["move", "eat"]
         for agent_id in range(num_agents):
@@ -205,14 +221,13 @@ class HarvestAgent(DQNAgent):
     def _ethics_sanction(self, can_help):
         if not can_help:
             return 0
-        society_well_being = self.model.get_society_well_being(self, True)
-        sanction = self.ethics_module.get_sanction(society_well_being)
+        sanction = self.ethics_module.get_sanction()
         return sanction
     
-    def _update_ethics(self, society_well_being):
+    def _update_ethics(self):
         if self.berries > 0 and self.health >= self.low_health_threshold:
             can_help = True
-            self.ethics_module.update_social_welfare(self.agent_type, society_well_being)
+            self.ethics_module.update_social_welfare(self.agent_type)
         else:
             can_help = False
         return can_help
@@ -1,6 +1,10 @@
+import numpy as np
+from src.norm_table import CONSEQUENT_TERMS
+
 class NormsModule():
     """
     Norms Module (Algorithm 2) handles tracking of behaviours and norms
+    Behaviours are interned in the society's norm table; the behaviour base holds their ids and metrics in parallel arrays
     Instance variables:
         agent_id -- identification of agent
         max_norms -- max size of norms and behaviour bases
@@ -12,12 +16,21 @@ class NormsModule():
         low_days_left_threshold -- antecedent threshold for "low days"
         high_days_left_threshold -- antecedent threshold for "high days"
         norm_decay_rate -- decay of norm over time
+        partial_selection_factor -- clip by top-k selection rather than a full sort when behaviour base is at least this many times max norms
+        norm_tracker -- society-level tracker notified when behaviours are created, updated or clipped
+        norm_table -- society-level table of behaviour ids
+        norm_ids -- id of each behaviour in the behaviour base
+        behaviours -- reward, numerosity, creation day and fitness of each behaviour in the behaviour base, in the same order as norm ids
+        current_day -- day behaviour ages are measured at; a behaviour's age is the number of updates since the day it was created
+        slots -- position of each behaviour id in the behaviour base arrays
+        num_behaviours -- number of behaviours in the behaviour base
     """
-    def __init__(self,agent_id):
+    def __init__(self,agent_id,norm_tracker,norm_table):
         self.agent_id = agent_id
+        self.norm_tracker = norm_tracker
+        self.norm_table = norm_table
         self.max_norms = 100
         self.norm_clipping_frequency = 10
-        self.behaviour_base = {}
         self.low_health_threshold = 0.6
         self.high_health_threshold = 2.0
         self.low_berries_threshold = 1
@@ -25,89 +38,152 @@ class NormsModule():
         self.low_days_left_threshold = 10
         self.high_days_left_threshold = 30
         self.norm_decay_rate = 0.3
+        self.partial_selection_factor = 8
+        #behaviour base can exceed max norms between clippings, so arrays start with spare capacity and grow if needed
+        capacity = 2 * self.max_norms
+        self.norm_ids = np.empty(capacity, dtype=np.int64)
+        self.behaviours = {"reward": np.empty(capacity, dtype=np.float64),
+                           "numerosity": np.empty(capacity, dtype=np.int64),
+                           "created_day": np.empty(capacity, dtype=np.int64),
+                           "fitness": np.empty(capacity, dtype=np.float64)}
+        self.slots = {}
+        self.num_behaviours = 0
+        self.current_day = 0
 
     def get_antecedent(self, berries, health, well_being):
         """
-        Get antecedent string from view of agent's berries and health and society well-being
+        Get antecedent code from view of agent's berries and health and society well-being
+        The code packs one byte per term after a leading 1, so views of societies of different sizes have different codes
         """
         if berries == 0:
-            b = "no berries"
+            b = 0
         elif berries > 0 and berries < self.low_berries_threshold:
-            b = "low berries"
+            b = 1
         elif berries >= self.low_berries_threshold and berries < self.high_berries_threshold:
-            b = "medium berries"
+            b = 2
         else:
-            b = "high berries"
+            b = 3
         if health < self.low_health_threshold:
-            h = "low health"
+            h = 0
         elif health >= self.low_health_threshold and health < self.high_health_threshold:
-            h = "medium health"
+            h = 1
         else:
-            h = "high health"
-        view = ["IF", b, h]
-        for w in well_being:
-            if w < self.low_days_left_threshold:
-                view.append("low days")
-            elif w >= self.low_days_left_threshold and w < self.high_days_left_threshold:
-                view.append("medium days")
-            else:
-                view.append("high days")
-        antecedent = ",".join(view)
+            h = 2
+        well_being = np.asarray(well_being)
+        #0 for low days, 1 for medium days, 2 for high days
+        days = (well_being >= self.low_days_left_threshold).astype(np.uint8) + (well_being >= self.high_days_left_threshold)
+        antecedent = int.from_bytes(bytes((1, b, h)) + days.tobytes(), "big")
         return antecedent
 
     def get_consequent(self, action):
         """
-        Get consequent string from action
+        Get consequent (index into consequent terms) from action
         """
-        consequent = "THEN,"
         if action == "north" or action == "east" or action == "south" or action == "west":
-            return consequent + "move"
+            return CONSEQUENT_TERMS.index("move")
         elif "throw" in action:
-            return consequent + "throw"
+            return CONSEQUENT_TERMS.index("throw")
         else:
-            return consequent + action
-    
+            return CONSEQUENT_TERMS.index(action)
+
     def update_behaviour_base(self, antecedent, action, reward, day):
         """
         Update current behaviour and then update the age of all behaviours in behaviour base
         If day == clipping frequency, clip behaviour base if it exceeds maximum capacity
         """
+        self.current_day = day
         self._update_behaviour(antecedent,action,reward)
         self._update_behaviours_age()
         if day % self.norm_clipping_frequency == 0:
             self._clip_behaviour_base()
 
+    def get_num_behaviours(self):
+        return self.num_behaviours
+
+    def get_metric(self, norm_id, metric):
+        """
+        Get the reward, numerosity or fitness of a behaviour in behaviour base
+        """
+        return self.behaviours[metric][self.slots[norm_id]].item()
+
+    def clear(self):
+        """
+        Remove all behaviours from behaviour base
+        """
+        for norm_id in self.slots:
+            self.norm_tracker.remove(self.agent_id, norm_id)
+        self.slots = {}
+        self.num_behaviours = 0
+
     def _update_behaviour(self, antecedent, action, reward):
         consequent = self.get_consequent(action)
-        current_norm = ",".join([antecedent,consequent])
-        norm = self.behaviour_base.get(current_norm)
-        if norm != None:
-            norm["reward"] += reward
-            norm["numerosity"] += 1
-            self._update_norm_fitness(norm)
+        norm_id = self.norm_table.intern(antecedent, consequent)
+        slot = self.slots.get(norm_id)
+        if slot != None:
+            self.behaviours["reward"][slot] += reward
+            self.behaviours["numerosity"][slot] += 1
+            self._update_norm_fitness(slot)
+            self.norm_tracker.update(norm_id)
         else:
-            self.behaviour_base[current_norm] = {"reward": reward,
-                                    "numerosity": 1,
-                                    "age": 0,
-                                    "fitness": 0}
-            
+            if self.num_behaviours == len(self.norm_ids):
+                self._grow()
+            slot = self.num_behaviours
+            self.norm_ids[slot] = norm_id
+            self.behaviours["reward"][slot] = reward
+            self.behaviours["numerosity"][slot] = 1
+            self.behaviours["created_day"][slot] = self.current_day
+            self.behaviours["fitness"][slot] = 0
+            self.slots[norm_id] = slot
+            self.num_behaviours += 1
+            self.norm_tracker.add(self.agent_id, norm_id, self)
+
     def _update_behaviours_age(self):
-        for value in self.behaviour_base.values():
-            if "age" in value:
-                value["age"] += 1
-    
-    def _update_norm_fitness(self, norm):
-        if norm["age"] != 0:
-            discounted_age = self.norm_decay_rate * norm["age"]
-            fitness = norm["numerosity"] * norm["reward"] * discounted_age
-            norm["fitness"] = round(fitness, 4)
+        #ages are derived from creation days, so ageing every behaviour is moving the current day on
+        self.current_day += 1
+
+    def _get_age(self, slot):
+        return self.current_day - self.behaviours["created_day"][slot].item()
+
+    def _update_norm_fitness(self, slot):
+        age = self._get_age(slot)
+        if age != 0:
+            discounted_age = self.norm_decay_rate * age
+            fitness = self.behaviours["numerosity"][slot].item() * self.behaviours["reward"][slot].item() * discounted_age
+            self.behaviours["fitness"][slot] = round(fitness, 4)
 
     def _clip_behaviour_base(self):
-        if len(self.behaviour_base.keys()) > self.max_norms:
-            for metadata in self.behaviour_base.values():
-                self._update_norm_fitness(metadata)
-            assessed_base = self._assess(self.behaviour_base)
-            self.behaviour_base = dict(assessed_base[:self.max_norms])
+        if self.num_behaviours > self.max_norms:
+            for slot in range(self.num_behaviours):
+                self._update_norm_fitness(slot)
+                self.norm_tracker.update(self.norm_ids[slot].item())
+            kept = self._assess(self.max_norms)
+            dropped = np.ones(self.num_behaviours, dtype=bool)
+            dropped[kept] = False
+            for norm_id in self.norm_ids[:self.num_behaviours][dropped].tolist():
+                self.norm_tracker.remove(self.agent_id, norm_id)
+            self.norm_ids[:self.max_norms] = self.norm_ids[kept]
+            for values in self.behaviours.values():
+                values[:self.max_norms] = values[kept]
+            self.num_behaviours = self.max_norms
+            self.slots = {norm_id: slot for slot, norm_id in enumerate(self.norm_ids[:self.num_behaviours].tolist())}
+
+    def _assess(self, k):
+        """
+        Get the positions of the k fittest behaviours in order of descending fitness, as a stable sort of the whole behaviour base would
+        Large behaviour bases only sort the k selected behaviours: fitness above the k-th largest is kept, and ties at it keep the earliest behaviours
+        """
+        fitness = self.behaviours["fitness"][:self.num_behaviours]
+        if self.num_behaviours < self.partial_selection_factor * k:
+            #selection costs more than sorting small behaviour bases (see benchmarks/clip_behaviour_base.py)
+            return np.argsort(-fitness, kind="stable")[:k]
+        threshold = np.partition(fitness, self.num_behaviours - k)[self.num_behaviours - k]
+        above = np.flatnonzero(fitness > threshold)
+        ties = np.flatnonzero(fitness == threshold)[:k - len(above)]
+        selected = np.sort(np.concatenate((above, ties)))
+        return selected[np.argsort(-fitness[selected], kind="stable")]
 
-    def _assess(self, pop):
-        return sorted(pop.items(), key=lambda item: item[1]["fitness"], reverse=True)
\ No newline at end of file
+    def _grow(self):
+        capacity = 2 * len(self.norm_ids)
+        self.norm_ids = np.resize(self.norm_ids, capacity)
+        for metric, values in self.behaviours.items():
+            self.behaviours[metric] = np.resize(values, capacity)
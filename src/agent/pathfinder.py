@@ -0,0 +1,108 @@
+import heapq
+
+#direction names as used by the moving module: west and east increase and decrease x, north and south increase and decrease y
+MOVES = [((0, 1), "north"), ((0, -1), "south"), ((1, 0), "west"), ((-1, 0), "east")]
+
+class ManhattanPath:
+    """
+    Manhattan path is a shortest path between two cells of an obstacle-free grid, computed in closed form
+    Steps are in the order the A* search used before returned them (so runs keep their trajectories): first the steps along the longer axis that the shorter axis cannot pair with, then x and y steps alternately (y first when moving west, x first when moving east)
+    Its length and any step are O(1), so it can be used wherever a list of directions is expected without being built
+    Instance variables:
+        lead_direction -- direction of the unpaired steps along the longer axis
+        lead_steps -- number of unpaired steps along the longer axis
+        paired_directions -- directions of the alternating x and y steps, in the order they are taken
+        length -- number of steps in total
+    """
+    def __init__(self, start, end):
+        dx, dy = end[0] - start[0], end[1] - start[1]
+        x_direction = "west" if dx > 0 else "east"
+        y_direction = "north" if dy > 0 else "south"
+        self.lead_direction = x_direction if abs(dx) > abs(dy) else y_direction
+        self.lead_steps = abs(abs(dx) - abs(dy))
+        self.paired_directions = (y_direction, x_direction) if dx > 0 else (x_direction, y_direction)
+        self.length = abs(dx) + abs(dy)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, step):
+        if step < 0:
+            step += self.length
+        if not 0 <= step < self.length:
+            raise IndexError(step)
+        if step < self.lead_steps:
+            return self.lead_direction
+        return self.paired_directions[(step - self.lead_steps) % 2]
+
+    def __iter__(self):
+        for step in range(self.length):
+            yield self[step]
+
+class Pathfinder:
+    """
+    Pathfinder finds shortest paths between cells of a rectangle of the grid
+    Without obstacles the path is closed form; with obstacles it falls back to A* search
+    Instance variables:
+        min_width -- minimum x of the rectangle
+        max_width -- maximum x (exclusive) of the rectangle
+        min_height -- minimum y of the rectangle
+        max_height -- maximum y (exclusive) of the rectangle
+        obstacles -- cells which cannot be moved through
+    """
+    def __init__(self, min_width, max_width, min_height, max_height, obstacles=()):
+        self.min_width = min_width
+        self.max_width = max_width
+        self.min_height = min_height
+        self.max_height = max_height
+        self.obstacles = set(obstacles)
+
+    def find_path(self, start, end):
+        """
+        Find a shortest path as a sequence of directions from start to end; None if there is no path
+        """
+        if not self.obstacles:
+            return ManhattanPath(start, end)
+        return self._a_star(start, end)
+
+    def get_distance(self, start, end):
+        """
+        Get the length of a shortest path from start to end; None if there is no path
+        """
+        if not self.obstacles:
+            return abs(end[0] - start[0]) + abs(end[1] - start[1])
+        path = self._a_star(start, end)
+        return None if path is None else len(path)
+
+    def _get_neighbours(self, node):
+        x, y = node
+        for (dx, dy), direction in MOVES:
+            neighbour = (x + dx, y + dy)
+            if self.min_width <= neighbour[0] < self.max_width and self.min_height <= neighbour[1] < self.max_height and neighbour not in self.obstacles:
+                yield neighbour, direction
+
+    def _a_star(self, start, end):
+        #Manhattan distance is an admissible heuristic for 4-connected moves with uniform cost
+        def heuristic(node):
+            return abs(end[0] - node[0]) + abs(end[1] - node[1])
+        open_set = [(heuristic(start), 0, start)]
+        came_from = {}
+        g_values = {start: 0}
+        while open_set:
+            _, current_g, current_node = heapq.heappop(open_set)
+            if current_node == end:
+                path = []
+                while current_node in came_from:
+                    current_node, direction = came_from[current_node]
+                    path.append(direction)
+                return path[::-1]
+            if current_g > g_values[current_node]:
+                #stale entry for a node since reached more cheaply
+                continue
+            for neighbour, direction in self._get_neighbours(current_node):
+                tentative_g = current_g + 1
+                if neighbour not in g_values or tentative_g < g_values[neighbour]:
+                    g_values[neighbour] = tentative_g
+                    came_from[neighbour] = (current_node, direction)
+                    heapq.heappush(open_set, (tentative_g + heuristic(neighbour), tentative_g, neighbour))
+        return None
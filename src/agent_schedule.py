@@ -0,0 +1,58 @@
+import numpy as np
+
+class AgentSchedule:
+    """
+    Agent schedule activates every acting agent once per step in a random order
+    Only agents which act are activated: their ids are held in an array, and each step activates them in a permutation drawn from the schedule's generator
+    Berries do not act, so they are held separately for the model to reset
+    Instance variables:
+        rng -- generator of activation orders
+        agents_by_id -- acting agents by id
+        ids -- ids of acting agents, in order of addition
+        berries -- berries, in order of addition
+        steps -- number of steps taken
+    """
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.agents_by_id = {}
+        self.ids = np.empty(0, dtype=np.int64)
+        self.berries = []
+        self.steps = 0
+
+    @property
+    def agents(self):
+        """
+        Acting agents in order of addition
+        """
+        return [self.agents_by_id[agent_id] for agent_id in self.ids.tolist()]
+
+    def add(self, agent):
+        """
+        Add an agent to be activated each step, or a berry to be held
+        """
+        if agent.agent_type == "berry":
+            self.berries.append(agent)
+        else:
+            self.agents_by_id[agent.unique_id] = agent
+            self.ids = np.append(self.ids, agent.unique_id)
+
+    def step(self):
+        """
+        Step each acting agent once in a random order
+        """
+        for agent_id in self.rng.permutation(self.ids).tolist():
+            self.agents_by_id[agent_id].step()
+        self.steps += 1
+
+    def get_state(self):
+        """
+        Get the number of steps taken and the state of the generator of activation orders, for a snapshot
+        """
+        return {"steps": self.steps, "rng": self.rng.bit_generator.state}
+
+    def set_state(self, state):
+        """
+        Restore the number of steps taken and the generator of activation orders from a snapshot
+        """
+        self.steps = state["steps"]
+        self.rng.bit_generator.state = state["rng"]
@@ -0,0 +1,62 @@
+import numpy as np
+from .well_being_tracker import WellBeingTracker
+
+class AgentState:
+    """
+    Agent state holds the attributes of all agents as contiguous NumPy columns indexed by agent id, so society-wide views are slices rather than loops over agents
+    Instance variables:
+        health -- current health of each agent
+        berries -- number of berries each agent is carrying
+        days_left_to_live -- days each agent can live for given their health and berries
+        done -- whether each agent has finished (died) in the current episode
+        off_grid -- whether each agent has been removed from the grid
+        well_being -- days left to live of agents which are not done, tracking the society minimum as values change
+    """
+    def __init__(self, num_agents):
+        self.health = np.zeros(num_agents, dtype=np.float64)
+        self.berries = np.zeros(num_agents, dtype=np.int64)
+        self.days_left_to_live = np.zeros(num_agents, dtype=np.float64)
+        self.done = np.zeros(num_agents, dtype=bool)
+        self.off_grid = np.zeros(num_agents, dtype=bool)
+        self.well_being = WellBeingTracker(self.days_left_to_live.tolist())
+
+    def set(self, column, agent_id, value):
+        """
+        Set an agent's entry in a column, keeping the well-being tracker up to date
+        """
+        if column == "days_left_to_live":
+            if not self.done[agent_id]:
+                self.well_being.update(self.days_left_to_live[agent_id].item(), float(value))
+        elif column == "done":
+            if value and not self.done[agent_id]:
+                self.well_being.remove(self.days_left_to_live[agent_id].item())
+            elif not value and self.done[agent_id]:
+                self.well_being.add(self.days_left_to_live[agent_id].item())
+        getattr(self, column)[agent_id] = value
+
+    def get_society_well_being(self, observer_id, include_observer):
+        """
+        Get the well-being (days left to live) of a society
+        Including the observer, only agents which are not done are counted; excluding the observer, agents which are done count as 0
+        """
+        if include_observer:
+            return self.days_left_to_live[~self.done]
+        well_being = np.where(self.done, 0.0, self.days_left_to_live)
+        return np.delete(well_being, observer_id)
+
+class AgentStateColumn:
+    """
+    Agent state column is an agent attribute that reads and writes the agent's entry in a column of the model's agent state
+    Instance variables:
+        column -- name of the column in the agent state
+    """
+    def __init__(self, column):
+        self.column = column
+
+    def __get__(self, agent, owner=None):
+        if agent is None:
+            return self
+        return getattr(agent.model.agent_state, self.column)[agent.unique_id].item()
+
+    def __set__(self, agent, value):
+        agent.model.agent_state.set(self.column, agent.unique_id, value)
@@ -18,8 +18,5 @@ class Berry(Agent):
         self.min_height = min_height
         self.max_height = max_height
     
-    def step(self):
-        pass
-
     def reset(self):
         self.foraged = False
\ No newline at end of file
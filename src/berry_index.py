@@ -0,0 +1,110 @@
+import bisect
+
+class BerryIndex:
+    """
+    Berry index holds berries on the grid by cell and in square buckets of cells, both across the whole grid and per allocated agent
+    Berries at a cell are found in O(1); the nearest uneaten berry is found by searching rings of buckets outwards from a position, stopping once no closer bucket remains
+    Ties in distance go to the berry with the lowest id (the berry created first), as a scan of all berries in creation order would
+    Foraged berries stay indexed until they are respawned, and are skipped by lookups
+    Instance variables:
+        width -- width of grid
+        height -- height of grid
+        bucket_size -- width and height of buckets in cells
+        cells -- berries at each cell for each allocation key (None for all berries, otherwise the allocated agent id), sorted by id
+        buckets -- berries in each bucket for each allocation key
+        positions -- cell each berry is indexed at, by berry id
+        counts -- number of berries indexed for each allocation key
+    """
+    def __init__(self, width, height, bucket_size=4):
+        self.width = width
+        self.height = height
+        self.bucket_size = bucket_size
+        self.cells = {}
+        self.buckets = {}
+        self.positions = {}
+        self.counts = {}
+
+    def add(self, berry):
+        """
+        Index a berry at its position on the grid
+        """
+        self.positions[berry.unique_id] = berry.pos
+        bucket = self._get_bucket(berry.pos)
+        for key in self._get_keys(berry):
+            bisect.insort(self.cells.setdefault((key, berry.pos), []), berry, key=self._get_id)
+            self.buckets.setdefault((key, bucket), []).append(berry)
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def remove(self, berry):
+        """
+        Remove a berry from the index (before or after it has been removed from the grid)
+        """
+        position = self.positions.pop(berry.unique_id)
+        bucket = self._get_bucket(position)
+        for key in self._get_keys(berry):
+            for index, location in ((self.cells, (key, position)), (self.buckets, (key, bucket))):
+                berries = index[location]
+                berries.remove(berry)
+                if not berries:
+                    del index[location]
+            self.counts[key] -= 1
+
+    def get_berry(self, cell, agent_id=None):
+        """
+        Get the uneaten berry with the lowest id at a cell (allocated to agent id, if given); None if there is none
+        """
+        for berry in self.cells.get((agent_id, cell), ()):
+            if not berry.foraged:
+                return berry
+        return None
+
+    def get_berries(self, agent_id=None):
+        """
+        Get the uneaten berries (allocated to agent id, if given) in order of id
+        """
+        berries = [berry for (key, _), cell_berries in self.cells.items() if key == agent_id for berry in cell_berries if not berry.foraged]
+        return sorted(berries, key=self._get_id)
+
+    def get_nearest_berry(self, position, agent_id=None):
+        """
+        Get the uneaten berry (allocated to agent id, if given) with the smallest Euclidean distance to position; None if there is none
+        """
+        if self.counts.get(agent_id, 0) == 0:
+            return None
+        x, y = position
+        bucket_x, bucket_y = self._get_bucket(position)
+        nearest = None
+        nearest_key = None
+        max_radius = max(bucket_x, (self.width - 1) // self.bucket_size - bucket_x, bucket_y, (self.height - 1) // self.bucket_size - bucket_y)
+        radius = 0
+        #every cell in a ring r > 0 of buckets is at least (r - 1) * bucket size + 1 away along x or y
+        #so stop once that squared exceeds the squared distance of the nearest berry
+        while radius <= max_radius and (nearest_key is None or radius == 0 or ((radius - 1) * self.bucket_size + 1) ** 2 <= nearest_key[0]):
+            for bucket in self._get_ring(bucket_x, bucket_y, radius):
+                for berry in self.buckets.get((agent_id, bucket), ()):
+                    if not berry.foraged:
+                        berry_x, berry_y = self.positions[berry.unique_id]
+                        key = ((berry_x - x) ** 2 + (berry_y - y) ** 2, berry.unique_id)
+                        if nearest_key is None or key < nearest_key:
+                            nearest, nearest_key = berry, key
+            radius += 1
+        return nearest
+
+    def _get_bucket(self, cell):
+        return (cell[0] // self.bucket_size, cell[1] // self.bucket_size)
+
+    def _get_ring(self, x, y, radius):
+        #buckets at Chebyshev distance radius from bucket (x, y); buckets off the grid are simply empty
+        if radius == 0:
+            return [(x, y)]
+        ring = [(ring_x, ring_y) for ring_x in range(x - radius, x + radius + 1) for ring_y in (y - radius, y + radius)]
+        ring.extend((ring_x, ring_y) for ring_y in range(y - radius + 1, y + radius) for ring_x in (x - radius, x + radius))
+        return ring
+
+    def _get_keys(self, berry):
+        if berry.allocated_agent_id is None:
+            return (None,)
+        return (None, berry.allocated_agent_id)
+
+    def _get_id(self, berry):
+        return berry.unique_id
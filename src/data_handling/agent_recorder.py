@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+
+class AgentRecorder:
+    """
+    Agent recorder is an append-only columnar store of agent reports: one typed NumPy array per column, grown geometrically
+    Running accumulators give per-episode statistics without scanning the recorded rows; a DataFrame is only built when asked for
+    Instance variables:
+        columns -- name and dtype of each column, in report order
+        data -- array for each column
+        size -- number of rows recorded
+        capacity -- number of rows the arrays can hold before growing
+        accumulators -- count, sum, max of each summarised column, and running mean/sum of squared deviations for variance
+    """
+    columns = {"agent_id": np.int32,
+               "episode": np.int32,
+               "day": np.int32,
+               "berries": np.int32,
+               "berries_consumed": np.int32,
+               "berries_thrown": np.int32,
+               "health": np.float64,
+               "days_left_to_live": np.float64,
+               "total_days_left_to_live": np.float64,
+               "action": np.int32,
+               "reward": np.float64,
+               "num_norms": np.float64}
+    summarised_columns = ["berries", "berries_consumed", "berries_thrown", "health"]
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.data = {name: np.empty(self.capacity, dtype=dtype) for name, dtype in self.columns.items()}
+        self.size = 0
+        self._reset_accumulators()
+
+    def __len__(self):
+        return self.size
+
+    def record(self, agent_id, episode, day, berries, berries_consumed, berries_thrown, health, days_left_to_live, total_days_left_to_live, action, reward, num_norms):
+        """
+        Append one agent report in O(1) (amortised) and update the running accumulators; action -1 and num_norms NaN stand for None
+        """
+        if self.size == self.capacity:
+            self._grow()
+        i = self.size
+        data = self.data
+        data["agent_id"][i] = agent_id
+        data["episode"][i] = episode
+        data["day"][i] = day
+        data["berries"][i] = berries
+        data["berries_consumed"][i] = berries_consumed
+        data["berries_thrown"][i] = berries_thrown
+        data["health"][i] = health
+        data["days_left_to_live"][i] = days_left_to_live
+        data["total_days_left_to_live"][i] = total_days_left_to_live
+        data["action"][i] = -1 if action is None else action
+        data["reward"][i] = reward
+        data["num_norms"][i] = np.nan if num_norms is None else num_norms
+        self.size += 1
+        for name, value in (("berries", berries), ("berries_consumed", berries_consumed), ("berries_thrown", berries_thrown), ("health", health)):
+            accumulator = self.accumulators[name]
+            accumulator["count"] += 1
+            accumulator["sum"] += value
+            if value > accumulator["max"]:
+                accumulator["max"] = value
+            #Welford's update of the running mean and sum of squared deviations
+            delta = value - accumulator["mean"]
+            accumulator["mean"] += delta / accumulator["count"]
+            accumulator["m2"] += delta * (value - accumulator["mean"])
+
+    def get_column(self, name):
+        """
+        Get a view of the recorded values of a column
+        """
+        return self.data[name][:self.size]
+
+    def get_max(self, name):
+        accumulator = self.accumulators[name]
+        return accumulator["max"] if accumulator["count"] > 0 else np.nan
+
+    def get_mean(self, name):
+        accumulator = self.accumulators[name]
+        return accumulator["sum"] / accumulator["count"] if accumulator["count"] > 0 else np.nan
+
+    def get_variance(self, name):
+        """
+        Get the sample variance (as pandas, with 1 degree of freedom) of a column
+        """
+        accumulator = self.accumulators[name]
+        return accumulator["m2"] / (accumulator["count"] - 1) if accumulator["count"] > 1 else np.nan
+
+    def get_median(self, name):
+        if self.size == 0:
+            return np.nan
+        return np.median(self.get_column(name))
+
+    def clear(self):
+        """
+        Drop all recorded rows and reset the accumulators, keeping the allocated arrays
+        """
+        self.size = 0
+        self._reset_accumulators()
+
+    def to_columns(self):
+        """
+        Copy the recorded rows as a dictionary of column arrays; missing actions are NaN
+        """
+        columns = {name: self.get_column(name).copy() for name in self.columns}
+        action = columns["action"].astype(np.float64)
+        action[action == -1] = np.nan
+        columns["action"] = action
+        return columns
+
+    def to_dataframe(self):
+        """
+        Materialise the recorded rows as a DataFrame
+        """
+        df = pd.DataFrame(self.to_columns())
+        df["action"] = df["action"].astype("Int32")
+        return df
+
+    def _grow(self):
+        self.capacity *= 2
+        for name, column in self.data.items():
+            grown = np.empty(self.capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.data[name] = grown
+
+    def _reset_accumulators(self):
+        self.accumulators = {name: {"count": 0, "sum": 0, "max": -np.inf, "mean": 0.0, "m2": 0.0} for name in self.summarised_columns}
@@ -5,6 +5,9 @@ import json
 #import scipy.stats.pearsonr as pearsonr
 import numpy as np
 from src.data_handling.norm_processing import NormProcessing
+from src.data_handling.results_writer import read_report
+from src.data_handling.norm_log import convert_legacy_norm_log
+import os
 
 class DataAnalysis():
     """
@@ -17,6 +20,12 @@ class DataAnalysis():
         self.num_agents = num_agents
         self.filepath = filepath
     
+    def read_reports(self, filenames):
+        """
+        Read reports given their paths without extension, as Parquet if available otherwise CSV
+        """
+        return [read_report(filename) for filename in filenames]
+
     def proccess_and_display_all_data(self, agent_df_list, df_labels, scenario, norms_filepath):
         normalised_sum_df_list, agent_end_episode_list = self._process_agent_dfs(agent_df_list, df_labels)
         self._display_graphs(normalised_sum_df_list, agent_end_episode_list, df_labels)
@@ -39,8 +48,11 @@ class DataAnalysis():
         norm_processing = NormProcessing()
         cooperative_dfs = []
         for label in df_labels:
-            input_file = filepath+"_"+label+"_emerged_norms.json"
+            input_file = filepath+"_"+label+"_emerged_norms.jsonl"
             output_file = self.filepath+scenario+"_"+label+"_norms"
+            if not os.path.exists(input_file):
+                #norms written before norm logs were used are converted into the writing directory
+                input_file = convert_legacy_norm_log(filepath+"_"+label+"_emerged_norms.json", self.filepath+scenario+"_"+label+"_emerged_norms.jsonl")
             cooperative_dfs.append(norm_processing.proccess_norms(input_file, output_file))
         self._display_swarm_plot(cooperative_dfs,df_labels, "numerosity", filepath+"_cooperative_numerosity")
         self._display_swarm_plot(cooperative_dfs,df_labels, "fitness", filepath+"_cooperative_fitness")
@@ -0,0 +1,137 @@
+import atexit
+import json
+import os
+import queue
+import threading
+
+class NormLogWriter:
+    """
+    Norm log writer appends the emerged norms of each episode to a line-delimited JSON file, one compact record per episode
+    Records are serialised and written on a background thread through a buffered file, so the simulation does not wait on disk I/O
+    The file is valid after every record, whether or not the run reaches its last episode
+    Instance variables:
+        filename -- path of the norm log
+        pending -- queue of records waiting to be written
+        thread -- background writer thread (started on the first record)
+        error -- exception raised by the writer thread, raised again on flush
+        closed -- whether the log has been finalised
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.pending = queue.Queue()
+        self.thread = None
+        self.error = None
+        self.closed = False
+        atexit.register(self.close)
+
+    def append(self, episode, norms):
+        """
+        Queue the emerged norms of an episode to be written; norms must not be changed after being appended
+        """
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._write_records, daemon=True)
+            self.thread.start()
+        self.pending.put((episode, norms))
+
+    def flush(self):
+        """
+        Wait until all queued records have been written to file
+        """
+        if self.thread is not None:
+            self.pending.put("flush")
+            self.pending.join()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def checkpoint(self):
+        """
+        Write all queued records to file; returns the length of the file, for a snapshot to resume the log from
+        """
+        self.flush()
+        if not os.path.exists(self.filename):
+            return 0
+        return os.path.getsize(self.filename)
+
+    def resume(self, position):
+        """
+        Continue a log from a checkpoint, dropping any records written after it
+        """
+        if os.path.exists(self.filename):
+            with open(self.filename, "r+") as file:
+                file.truncate(position)
+
+    def close(self):
+        """
+        Write all queued records, close the file and stop the writer thread
+        """
+        if self.closed:
+            return
+        self.closed = True
+        #a closed log no longer needs closing at exit, so the hook should not keep it alive
+        atexit.unregister(self.close)
+        if self.thread is not None:
+            self.pending.put(None)
+            self.thread.join()
+            self.thread = None
+        self.flush()
+
+    def _write_records(self):
+        with open(self.filename, "a", buffering=1<<16) as file:
+            while True:
+                record = self.pending.get()
+                try:
+                    if record is None:
+                        return
+                    if record == "flush":
+                        file.flush()
+                    else:
+                        episode, norms = record
+                        file.write(json.dumps({"episode": episode, "norms": norms}, separators=(",", ":"))+"\n")
+                except Exception as e:
+                    self.error = e
+                finally:
+                    self.pending.task_done()
+
+def read_norm_log(filename):
+    """
+    Stream the records of a norm log, yielding the episode number and a dictionary of emerged norms for one episode at a time
+    """
+    with open(filename) as file:
+        for line in file:
+            if line.strip():
+                record = json.loads(line)
+                yield record["episode"], record["norms"]
+
+def convert_legacy_norm_log(input_file, output_file):
+    """
+    Convert emerged norms written as one indented JSON object of episodes (the format used before norm logs) to a norm log
+    Files left unterminated by runs which stopped before their last episode are repaired
+    """
+    with open(input_file) as file:
+        text = file.read().rstrip().rstrip(",")
+    if not text.endswith("}"):
+        text += "}"
+    data = json.loads(text)
+    temporary_file = output_file+".tmp"
+    with open(temporary_file, "w") as file:
+        for episode, episode_norms in data.items():
+            norms = {}
+            for norm in episode_norms:
+                norms.update(norm)
+            file.write(json.dumps({"episode": int(episode), "norms": norms}, separators=(",", ":"))+"\n")
+    os.replace(temporary_file, output_file)
+    return output_file
+
+def merge_norm_logs(input_files, output_file, episode_offsets):
+    """
+    Merge norm logs of runs of consecutive ranges of episodes into one norm log, as one run of all the episodes would have written it
+    The episodes of each log are shifted by its offset; logs are merged in the order given
+    """
+    temporary_file = output_file+".tmp"
+    with open(temporary_file, "w", buffering=1<<16) as file:
+        for input_file, episode_offset in zip(input_files, episode_offsets):
+            for episode, norms in read_norm_log(input_file):
+                file.write(json.dumps({"episode": episode + episode_offset, "norms": norms}, separators=(",", ":"))+"\n")
+    os.replace(temporary_file, output_file)
+    return output_file
@@ -1,5 +1,6 @@
 import json
 import pandas as pd
+from .norm_log import read_norm_log
 
 class NormProcessing():
     def __init__(self):
@@ -8,26 +9,28 @@ class NormProcessing():
         self.min_reward = 50
     
     def proccess_norms(self, input_file, output_file):
-        f = open(input_file)
-        data = json.load(f)
-        cooperative_data = self._count_cooperative_norms(data, output_file)
-        data = self._merge_norms(data, output_file)
+        #stream the norm log one episode at a time, counting and merging norms in a single pass
+        cooperative_norms = []
+        emerged_norms = {}
+        n_norms = 0
+        for episode_number, episode_norms in read_norm_log(input_file):
+            n_norms += len(episode_norms)
+            self._count_cooperative_norms(episode_norms, cooperative_norms)
+            self._merge_norms(episode_norms, emerged_norms)
+        cooperative_data = self._write_cooperative_norms(cooperative_norms, n_norms, output_file)
+        data = self._write_merged_norms(emerged_norms, output_file)
         self._generalise_norms(data.keys(), output_file)
         #self._generate_norms_tree(data, output_file)
         return cooperative_data
     
-    def _count_cooperative_norms(self, data, output_file):
-        cooperative_norms = []
-        n_norms = 0
-        for episode_number, episode_norms in data.items():
-            for norm in episode_norms:
-                n_norms += 1
-                norm_name = list(norm.keys())[0]
-                norm_value = list(norm.values())[0]
-                consequent = norm_name.split("THEN")[1].strip(",")
-                if consequent == "throw":
-                    norm_data = {"reward": norm_value["reward"], "numerosity": norm_value["numerosity"], "fitness": norm_value["fitness"]}
-                    cooperative_norms.append(norm_data)
+    def _count_cooperative_norms(self, episode_norms, cooperative_norms):
+        for norm_name, norm_value in episode_norms.items():
+            consequent = norm_name.split("THEN")[1].strip(",")
+            if consequent == "throw":
+                norm_data = {"reward": norm_value["reward"], "numerosity": norm_value["numerosity"], "fitness": norm_value["fitness"]}
+                cooperative_norms.append(norm_data)
+
+    def _write_cooperative_norms(self, cooperative_norms, n_norms, output_file):
         print("Total emerged norms:", n_norms, "Total cooperative norms:", len(cooperative_norms))
         print("Proportion of cooperative norms for "+output_file+" is "+str((len(cooperative_norms)/n_norms)*100))
         df = pd.DataFrame(cooperative_norms)
@@ -104,40 +107,46 @@ class NormProcessing():
                 output += f"{indent}{key}: {value}\n"
         return output
 
-    def _merge_norms(self,data,output_file):
+    def _merge_norms(self, episode_norms, emerged_norms):
         """
-        Merges duplicates of norms into one dictionary
+        Merges the norms of one episode into a dictionary of unique norms
 
         Args:
-            data: Norm base to remove duplicates from (dictionary).
-            filename: The file to write the unique set of norms to.
-            filter: Whether to filter the norms by fitness and number of instances.
-            min_instances: Minimum number of instances of a norm to include in unique set.
-            min_fitness: Minimum fitness of norm to include in unique set.
+            episode_norms: Norms which emerged in the episode (dictionary).
+            emerged_norms: Unique set of norms merged so far (dictionary), updated in place.
 
         Returns:
             A dictionary containing the unique set of norms.
         """
+        for norm_name, norm_data in episode_norms.items():
+            if ("throw" in norm_name and "no berries" in norm_name) or ("eat" in norm_name and "no berries" in norm_name):
+                continue
+            if norm_name not in emerged_norms.keys():
+                emerged_norms[norm_name] = {"reward": norm_data["reward"],
+                                            "numerosity": norm_data["numerosity"],
+                                            "fitness": norm_data["fitness"],
+                                            "adoption": norm_data["adoption"],
+                                            "num_instances_across_episodes": 1}
+            else:
+                emerged_norms[norm_name]["reward"] += norm_data["reward"]
+                emerged_norms[norm_name]["numerosity"] += norm_data["numerosity"]
+                emerged_norms[norm_name]["fitness"] += norm_data["fitness"]
+                emerged_norms[norm_name]["adoption"] += norm_data["adoption"]
+                emerged_norms[norm_name]["num_instances_across_episodes"] += 1
+        return emerged_norms
+
+    def _write_merged_norms(self, emerged_norms, output_file):
+        """
+        Sorts the unique set of norms by fitness and writes it to file
+
+        Args:
+            emerged_norms: Unique set of norms (dictionary).
+            output_file: The file prefix to write the unique set of norms and their keys to.
+
+        Returns:
+            A dictionary containing the unique set of norms, sorted by fitness.
+        """
         filename = output_file+"_merged.txt"
-        emerged_norms = {}
-        for episode_number, episode_norms in data.items():
-            #key is the episode number; value is the emerged norms from that episode
-            for norm in episode_norms:
-                for norm_name, norm_data in norm.items():
-                    if ("throw" in norm_name and "no berries" in norm_name) or ("eat" in norm_name and "no berries" in norm_name):
-                        continue
-                    if norm_name not in emerged_norms.keys():
-                        emerged_norms[norm_name] = {"reward": norm_data["reward"],
-                                                    "numerosity": norm_data["numerosity"],
-                                                    "fitness": norm_data["fitness"],
-                                                    "adoption": norm_data["adoption"],
-                                                    "num_instances_across_episodes": 1}
-                    else:
-                        emerged_norms[norm_name]["reward"] += norm_data["reward"]
-                        emerged_norms[norm_name]["numerosity"] += norm_data["numerosity"]
-                        emerged_norms[norm_name]["fitness"] += norm_data["fitness"]
-                        emerged_norms[norm_name]["adoption"] += norm_data["adoption"]
-                        emerged_norms[norm_name]["num_instances_across_episodes"] += 1
         emerged_norms = dict(sorted(emerged_norms.items(), key=lambda item: item[1]["fitness"], reverse=True))
         with open(filename, "a+") as file:
             file.seek(0)
@@ -0,0 +1,258 @@
+import atexit
+import glob
+import os
+import numpy as np
+import pandas as pd
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+AGENT_REPORT_COLUMNS = {"agent_id": "int16",
+                        "episode": "int32",
+                        "day": "int16",
+                        "berries": "int16",
+                        "berries_consumed": "int16",
+                        "berries_thrown": "int16",
+                        "health": "float32",
+                        "days_left_to_live": "float32",
+                        "total_days_left_to_live": "float32",
+                        "action": "Int16",
+                        "reward": "float32",
+                        "num_norms": "float32"}
+
+MODEL_EPISODE_REPORT_COLUMNS = {"episode": "int32",
+                                "end_day": "int16",
+                                "epsilon": "float32",
+                                "mean_reward": "float32",
+                                "mean_loss": "float32",
+                                "max_berries": "float32",
+                                "mean_berries": "float32",
+                                "max_berries_consumed": "float32",
+                                "mean_berries_consumed": "float32",
+                                "gini_berries_consumed": "float32",
+                                "mean_berries_thrown": "float32",
+                                "max_health": "float32",
+                                "mean_health": "float32",
+                                "median_health": "float32",
+                                "variance_health": "float32",
+                                "deceased": "int16",
+                                "num_emerged_norms": "float32"}
+
+#legacy CSV reports named the total days left to live column "total_days"
+CSV_COLUMN_NAMES = {"total_days_left_to_live": "total_days"}
+
+class ResultsWriter:
+    """
+    Results writer buffers report rows in memory and appends them to a compressed Parquet file, one row group every n episodes
+    Columns are downcast to fixed dtypes; if pyarrow is not installed, rows are appended to a CSV file in the same batches instead
+    A checkpoint finalises the Parquet file so it stays readable; row groups written after it go to a new part file, and parts are joined into the report once on close
+    Instance variables:
+        filename -- path of the report without extension
+        columns -- name and dtype of each column
+        flush_every_episodes -- number of episodes to buffer before writing
+        file_format -- "parquet" or "csv"
+        path -- path of the report file
+        buffer -- buffered chunks of columns
+        buffered_episodes -- number of episodes buffered since the last write
+        writer -- open Parquet writer (None until the first row group)
+        segments -- number of finalised Parquet files the report is written across (the report itself, then part files)
+        closed -- whether the file has been finalised
+    """
+    def __init__(self, filename, columns, flush_every_episodes=10):
+        self.filename = filename
+        self.columns = columns
+        self.flush_every_episodes = flush_every_episodes
+        self.file_format = "parquet" if pq is not None else "csv"
+        self.path = filename+"."+self.file_format
+        self.buffer = []
+        self.buffered_episodes = 0
+        self.writer = None
+        self.segments = 0
+        self.closed = False
+        atexit.register(self.close)
+
+    def append(self, data):
+        """
+        Buffer rows given as a dictionary of column name to values (lists or arrays of equal length)
+        """
+        self.buffer.append(data)
+
+    def end_episode(self):
+        """
+        Mark the end of an episode, writing the buffered rows if the flush interval is due
+        """
+        self.buffered_episodes += 1
+        if self.buffered_episodes >= self.flush_every_episodes:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the buffered rows as one row group
+        """
+        self.buffered_episodes = 0
+        if not self.buffer:
+            return
+        df = self._buffer_to_dataframe()
+        self.buffer = []
+        if self.file_format == "parquet":
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self._get_segment_path(self.segments), table.schema, compression="zstd")
+            self.writer.write_table(table)
+        else:
+            df.rename(columns=CSV_COLUMN_NAMES).to_csv(self.path, mode="a", header=False)
+
+    def close(self):
+        """
+        Write any buffered rows and finalise the file
+        """
+        if self.closed:
+            return
+        self.closed = True
+        #the exit hook is only needed while the writer is open; removing it lets a closed writer and its buffer be freed
+        atexit.unregister(self.close)
+        self.flush()
+        self._close_writer()
+        if self.segments > 1:
+            self._join_segments()
+
+    def checkpoint(self):
+        """
+        Write any buffered rows and finalise the file being written; returns the number of finalised Parquet files or bytes of CSV written, for a snapshot to resume the report from
+        """
+        self.flush()
+        if self.file_format == "parquet":
+            self._close_writer()
+            return self.segments
+        if not os.path.exists(self.path):
+            return 0
+        return os.path.getsize(self.path)
+
+    def resume(self, position):
+        """
+        Continue a report from a checkpoint, dropping any rows written after it
+        """
+        if self.file_format == "parquet":
+            self.segments = position
+            if position == 0 and os.path.exists(self.path):
+                os.remove(self.path)
+            for segment, part_path in self._get_part_paths():
+                if segment >= position:
+                    os.remove(part_path)
+        elif os.path.exists(self.path):
+            with open(self.path, "r+") as file:
+                file.truncate(position)
+
+    def write_header(self):
+        """
+        Start the report file; Parquet files are created on the first row group, CSV files get a header row
+        """
+        if self.file_format == "csv":
+            pd.DataFrame({name: [] for name in self.columns}).rename(columns=CSV_COLUMN_NAMES).to_csv(self.path, mode="a")
+
+    def _get_segment_path(self, segment):
+        if segment == 0:
+            return self.path
+        return self.filename+".part"+str(segment)+"."+self.file_format
+
+    def _get_part_paths(self):
+        #part files on disk with their segment number, including any left by an interrupted run
+        prefix = self.filename+".part"
+        part_paths = []
+        for part_path in glob.glob(glob.escape(prefix)+"*."+self.file_format):
+            segment = part_path[len(prefix):-len("."+self.file_format)]
+            if segment.isdigit():
+                part_paths.append((int(segment), part_path))
+        return sorted(part_paths)
+
+    def _close_writer(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+            self.segments += 1
+
+    def _join_segments(self):
+        #each row group is copied once, in order, into a file which replaces the report
+        temporary_path = self.filename+".tmp."+self.file_format
+        writer = None
+        for segment in range(self.segments):
+            segment_file = pq.ParquetFile(self._get_segment_path(segment))
+            for i in range(segment_file.num_row_groups):
+                table = segment_file.read_row_group(i)
+                if writer is None:
+                    writer = pq.ParquetWriter(temporary_path, table.schema, compression="zstd")
+                writer.write_table(table)
+        writer.close()
+        os.replace(temporary_path, self.path)
+        for segment in range(1, self.segments):
+            os.remove(self._get_segment_path(segment))
+        self.segments = 1
+
+    def _buffer_to_dataframe(self):
+        data = {}
+        for name, dtype in self.columns.items():
+            values = np.concatenate([np.asarray(chunk[name], dtype=np.float64 if dtype == "Int16" else None) for chunk in self.buffer])
+            if dtype == "Int16":
+                #nullable integer: missing values (None or NaN) are written as nulls
+                data[name] = pd.array(values, dtype="Float64").astype(dtype)
+            else:
+                data[name] = values.astype(dtype)
+        return pd.DataFrame(data)
+
+def read_report(filename):
+    """
+    Read a report written by a results writer, given its path without extension; reads Parquet if present, otherwise CSV
+    """
+    if pq is not None and exists_report(filename, "parquet"):
+        return pd.read_parquet(filename+".parquet")
+    return pd.read_csv(filename+".csv")
+
+def exists_report(filename, file_format=None):
+    """
+    Check if a report exists in either format (or the given format)
+    """
+    formats = [file_format] if file_format is not None else ["parquet", "csv"]
+    return any(os.path.exists(filename+"."+f) for f in formats)
+
+def export_csv(filename):
+    """
+    Export a Parquet report to a CSV file alongside it, in the format of reports written before Parquet was used
+    """
+    df = pd.read_parquet(filename+".parquet")
+    df.rename(columns=CSV_COLUMN_NAMES).to_csv(filename+".csv")
+    return filename+".csv"
+
+def export_csv_reports(directory):
+    """
+    Export every Parquet report under a directory to a CSV file alongside it, skipping segments of reports still being written
+    """
+    exported = []
+    for root, _, files in os.walk(directory):
+        for file in sorted(files):
+            if file.endswith(".parquet") and ".part" not in file:
+                exported.append(export_csv(os.path.join(root, file[:-len(".parquet")])))
+    return exported
+
+def merge_reports(filenames, filename, columns, episode_offsets):
+    """
+    Merge reports of runs of consecutive ranges of episodes into one report, as one run of all the episodes would have written it
+    The episodes of each report are shifted by its offset; reports are given without extension, and merged in the order given
+    """
+    writer = ResultsWriter(filename, columns)
+    writer.write_header()
+    for shard_filename, episode_offset in zip(filenames, episode_offsets):
+        df = read_report(shard_filename).rename(columns={csv_name: name for name, csv_name in CSV_COLUMN_NAMES.items()})
+        data = {}
+        for name, dtype in columns.items():
+            if dtype == "Int16":
+                data[name] = df[name].astype("Float64").to_numpy(dtype=np.float64, na_value=np.nan)
+            else:
+                data[name] = df[name].to_numpy()
+        data["episode"] = data["episode"] + episode_offset
+        writer.append(data)
+        writer.flush()
+    writer.close()
+    return writer.path
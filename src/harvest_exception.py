@@ -99,4 +99,14 @@ class NumFeaturesException(HarvestException):
         self.num_features = num_features
     
     def __str__(self):
-        return (f"Expected {self.num_expected_features} berries and got {self.num_features}")
\ No newline at end of file
+        return (f"Expected {self.num_expected_features} berries and got {self.num_features}")
+    
+class NumEpisodesException(HarvestException):
+    def __init__(self, file_name, num_expected_episodes, num_episodes):
+        super().__init__
+        self.file_name = file_name
+        self.num_expected_episodes = num_expected_episodes
+        self.num_episodes = num_episodes
+    
+    def __str__(self):
+        return (f"Expected {self.num_expected_episodes} episodes in {self.file_name} and got {self.num_episodes}")
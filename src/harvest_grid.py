@@ -0,0 +1,62 @@
+import numpy as np
+
+class HarvestGrid:
+    """
+    Harvest grid holds the agents and berries at each cell of a bounded (non-toroidal) grid, where any number of them can share a cell
+    The number of occupants of each cell is held in an integer array, so whether any cell is empty is kept as a running count rather than searched for
+    Instance variables:
+        width -- width of grid
+        height -- height of grid
+        occupancy -- number of agents and berries at each cell, indexed by x then y
+        contents -- agents and berries at each occupied cell
+        num_empty_cells -- number of cells with no occupants
+    """
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.occupancy = np.zeros((width, height), dtype=np.int32)
+        self.contents = {}
+        self.num_empty_cells = width * height
+
+    @property
+    def exists_empty_cells(self):
+        return self.num_empty_cells > 0
+
+    def place_agent(self, agent, cell):
+        """
+        Place an agent which is not on the grid at a cell
+        """
+        x, y = cell
+        if self.occupancy[x, y] == 0:
+            self.num_empty_cells -= 1
+        self.occupancy[x, y] += 1
+        self.contents.setdefault(cell, []).append(agent)
+        agent.pos = cell
+
+    def remove_agent(self, agent):
+        """
+        Remove an agent from the cell it is at
+        """
+        cell = agent.pos
+        x, y = cell
+        occupants = self.contents[cell]
+        occupants.remove(agent)
+        if not occupants:
+            del self.contents[cell]
+        self.occupancy[x, y] -= 1
+        if self.occupancy[x, y] == 0:
+            self.num_empty_cells += 1
+        agent.pos = None
+
+    def move_agent(self, agent, cell):
+        """
+        Move an agent from the cell it is at to another cell
+        """
+        self.remove_agent(agent)
+        self.place_agent(agent, cell)
+
+    def iter_cell_list_contents(self, cell):
+        """
+        Get the agents and berries at a cell
+        """
+        return tuple(self.contents.get(cell, ()))
@@ -1,18 +1,32 @@
 from mesa import Model
-from mesa.time import RandomActivation
-from mesa.space import MultiGrid
 import pandas as pd
 import numpy as np
-import json
+import os
+import pickle
+import shutil
 from .agent.harvest_agent import HarvestAgent
 from .berry import Berry
+from .agent_schedule import AgentSchedule
+from .random_streams import RandomStreams
+from .harvest_grid import HarvestGrid
+from .berry_index import BerryIndex
+from .agent_state import AgentState
+from .norm_emergence_tracker import NormEmergenceTracker
+from .norm_table import NormTable
+from .data_handling.agent_recorder import AgentRecorder
+from .data_handling.results_writer import ResultsWriter
+from .data_handling.results_writer import exists_report
+from .data_handling.results_writer import AGENT_REPORT_COLUMNS
+from .data_handling.results_writer import MODEL_EPISODE_REPORT_COLUMNS
+from .data_handling.norm_log import NormLogWriter
+from .agent.dqn.replay_buffer import ReplayBuffer
+from .agent.dqn.checkpoint_manager import CheckpointManager
 from .harvest_exception import FileExistsException
 from .harvest_exception import NoEmptyCells
 from .harvest_exception import NumAgentsException
 from .harvest_exception import AgentTypeException
 from .harvest_exception import NoBerriesException
 from .harvest_exception import NumBerriesException
-from os.path import exists
 from abc import abstractmethod
 
 class HarvestModel(Model):
@@ -26,24 +40,41 @@ class HarvestModel(Model):
         max_days -- max days in a single episode
         max_episode -- maximum number of episodes (for testing; training runs until epsilon is min epsilon)
         min_epsilon -- minimum epsilon to end training
-        schedule -- schedule of agents
+        random_streams -- independent random generators for each component of the run, derived from the run seed
+        rng -- generator of placements of agents and berries
+        schedule -- schedule of acting agents, which also holds berries
         max_with -- width of grid
         max_height -- height of grid
         grid -- grid object
+        berry_index -- berries on the grid by cell and allocated agent, for finding berries at a cell and nearest uneaten berries
+        agent_state -- health, berries, days left to live, done and off grid of every agent as columns indexed by agent id
         shared_replay_buffer -- replay buffer to share amongst agents to reduce training time
         agent_id -- tracker for unique agent ids
         berry_id -- tracker for unique berry ids
         episode -- current episode
         training -- boolean training or testing
         filepath -- file path for current run
+        results_path -- directory results and norms are written into
         write_data -- boolean to write data to file
         write_norms -- boolean to track norms and write to file
         societal_norm_emergence_threshold -- percentage of society required to have adopted a behaviour for it to become a norm
-        emerged_norms -- all norms which emerge in current episode
+        emerged_norms -- all norms which emerge in current episode, by behaviour id
+        norm_tracker -- adoption of every behaviour across the society, updated by agents' norms modules
+        norm_table -- ids of behaviours across the society, and their names for writing to file
+        norm_log -- writes the emerged norms of each episode to file in the background (None if norms are not written)
         min_fitness -- minimum fitness required for a behaviour to become a norm
         epsilon -- probability of exploration for agents (tracks when to end training)
+        checkpoint_manager -- writes agents' networks to file in the background during training
+        batch_actions -- boolean to choose all agents' actions in one forward pass per network before agents act; otherwise each agent observes the state left by the agent before it
+        macro_actions -- boolean for agents to move all the way to the nearest berry once they choose to move, choosing their next action only once it is foraged
+        learner_pool -- networks, replay buffer and checkpoint manager shared with copies of the scenario run side by side (None if the model learns alone)
+        resume -- boolean to continue the reports of an interrupted run, to be restored from a snapshot once the model is created, rather than start new reports
+        layout_rng_state -- state of the generator of placements before agents and berries were placed for the current episode
+        snapshot_path -- directory snapshots are saved to
+        snapshot_every_episodes -- save a snapshot every n episodes (None to not save snapshots)
+    Snapshots are taken between episodes, and hold everything needed to resume the run bit-for-bit from there: agents' networks, optimisers and exploration, the replay buffer (in memory-mapped files), every random generator and how far the reports had been written
     """
-    def __init__(self,num_agents,max_width,max_height,max_episodes,max_days,training,write_data,write_norms,filepath=""):
+    def __init__(self,num_agents,max_width,max_height,max_episodes,max_days,training,write_data,write_norms,filepath="",batch_actions=False,macro_actions=False,learner_pool=None,results_path="data/results/current_run/",seed=None,resume=False):
         super().__init__()
         self.num_agents = num_agents
         if self.num_agents <= 0:
@@ -54,31 +85,54 @@ class HarvestModel(Model):
         self.max_days = max_days
         self.max_episodes = max_episodes
         self.min_epsilon = 0.01
-        self.schedule = RandomActivation(self)
+        self.random_streams = RandomStreams(seed)
+        self.rng = self.random_streams.get_generator("environment")
+        self.schedule = AgentSchedule(self.random_streams.get_generator("schedule"))
         self.max_width = max_width
         self.max_height = max_height
-        self.grid = MultiGrid(self.max_width, self.max_height, False)
-        self.shared_replay_buffer = {"s": [], "a": [], "r": [], "s_": [], "done": []}
+        self.grid = HarvestGrid(self.max_width, self.max_height)
+        self.berry_index = BerryIndex(self.max_width, self.max_height)
+        self.agent_state = AgentState(self.num_agents)
+        self.learner_pool = learner_pool
+        if self.learner_pool is None:
+            self.shared_replay_buffer = ReplayBuffer(rng=self.random_streams.get_generator("replay"))
+        else:
+            self.shared_replay_buffer = self.learner_pool.replay_buffer
         self.agent_id = 0
         self.berry_id = 0
         self.episode = 1
         self.training = training
         self.filepath = filepath
+        self.results_path = results_path
         self.write_data = write_data
         self.write_norms = write_norms
         self.societal_norm_emergence_threshold = 0.9
         self.emerged_norms = {}
+        self.norm_tracker = NormEmergenceTracker()
+        self.norm_table = NormTable()
         self.min_fitness = 0.1
+        self.batch_actions = batch_actions
+        self.macro_actions = macro_actions
+        if self.learner_pool is None:
+            self.checkpoint_manager = CheckpointManager()
+        else:
+            self.checkpoint_manager = self.learner_pool.checkpoint_manager
         if self.training:
             self.epsilon = 0.9
         else:
             self.epsilon = 0.0
+        self.resume = resume
+        self.layout_rng_state = None
+        self.snapshot_path = None
+        self.snapshot_every_episodes = None
         self._init_reporters()
             
     def step(self):
         """
         Steps the schedule of agents, updates data collection, handles dead agents and foraged berries
         """
+        if self.batch_actions:
+            self._decide_actions()
         self.schedule.step()
         self.day += 1
         self._update_schedule()
@@ -89,15 +143,83 @@ class HarvestModel(Model):
         if self.day >= self.max_days or len(self.living_agents) <= 0:
             self.end_day = self.day
             if self.write_norms:
-                self._append_norm_dict_to_file(self.emerged_norms, "data/results/current_run/"+self.filepath+"_emerged_norms.json")
+                self.norm_log.append(self.episode, self.norm_table.render(self.emerged_norms))
             for a in self.schedule.agents:
-                if a.agent_type != "berry":
-                    if a.off_grid == False:
-                        a.days_survived = self.day
-                    if self.training: 
-                        a.save_models()
+                if a.off_grid == False:
+                    a.days_survived = self.day
+            if self.training:
+                self.checkpoint_manager.maybe_save(self.episode)
             self._collect_model_episode_data()
             self._reset()
+            if self.snapshot_path is not None and self.snapshot_every_episodes is not None and (self.episode - 1) % self.snapshot_every_episodes == 0:
+                self.save_snapshot(self.snapshot_path)
+
+    def close(self):
+        """
+        Write the final checkpoints and any buffered results to file
+        """
+        self.checkpoint_manager.close()
+        if self.agent_results is not None:
+            self.agent_results.close()
+        if self.model_episode_results is not None:
+            self.model_episode_results.close()
+        if self.norm_log is not None:
+            self.norm_log.close()
+
+    def save_snapshot(self, directory):
+        """
+        Save a snapshot of the run between episodes to directory, named by the number of episodes completed, replacing older snapshots; returns its path
+        The snapshot is written to a temporary directory and renamed into place, so an interrupted save leaves the previous snapshot intact
+        """
+        path = os.path.join(directory, "episode_"+str(self.episode - 1))
+        temporary_path = path+".tmp"
+        shutil.rmtree(temporary_path, ignore_errors=True)
+        os.makedirs(os.path.join(temporary_path, "replay_buffer"))
+        state = {"episode": self.episode,
+                 "epsilon": self.epsilon,
+                 "end_day": self.end_day,
+                 "layout_rng": self.layout_rng_state,
+                 "schedule": self.schedule.get_state(),
+                 "agents": {a.unique_id: a.get_state() for a in self.schedule.agents},
+                 "norm_table": self.norm_table.get_state(),
+                 "norm_tracker": self.norm_tracker.get_state(),
+                 "replay_buffer": self.shared_replay_buffer.save(os.path.join(temporary_path, "replay_buffer")),
+                 "reports": self._checkpoint_reporters()}
+        with open(os.path.join(temporary_path, "state.pkl"), "wb") as file:
+            pickle.dump(state, file)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(temporary_path, path)
+        for name in os.listdir(directory):
+            if name.startswith("episode_") and os.path.join(directory, name) != path:
+                shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+        return path
+
+    def load_snapshot(self, path):
+        """
+        Restore a snapshot saved by save_snapshot into a newly created model of the same scenario and agents, to continue the run from the episode it was taken before
+        """
+        with open(os.path.join(path, "state.pkl"), "rb") as file:
+            state = pickle.load(file)
+        #agents and berries are placed again from the generator state the episode was laid out with, so they are placed as they were
+        self.rng.bit_generator.state = state["layout_rng"]
+        self.episode = state["episode"] - 1
+        self._reset()
+        self.epsilon = state["epsilon"]
+        self.end_day = state["end_day"]
+        self.schedule.set_state(state["schedule"])
+        for a in self.schedule.agents:
+            a.set_state(state["agents"][a.unique_id])
+        self.norm_table.set_state(state["norm_table"])
+        self.norm_tracker.set_state(state["norm_tracker"])
+        self.shared_replay_buffer.load(os.path.join(path, "replay_buffer"), state["replay_buffer"])
+        for name, position in state["reports"].items():
+            getattr(self, name).resume(position)
+
+    def get_mean_train_step_time(self):
+        """
+        Get the mean seconds per training step of the agents' q networks (for profiling)
+        """
+        return get_mean_train_step_time(self.schedule.agents)
 
     def move_agent_to_cell(self, agent, new_pos):
         """
@@ -107,7 +229,7 @@ class HarvestModel(Model):
     
     def get_cell_contents(self, cell):
         """
-        Get the coordinates of a specified cell
+        Get the agents and berries at a specified cell
         """
         return self.grid.iter_cell_list_contents(cell)
 
@@ -115,43 +237,28 @@ class HarvestModel(Model):
         """
         Get the coordinates of uneaten berries
         """
-        berries_coordinates = []
-        for b in self.berries:
-            if b.foraged == False:
-                if agent_id==None:
-                    berries_coordinates.append(b.pos)
-                else:
-                    if b.allocated_agent_id == agent_id:
-                        berries_coordinates.append(b.pos)
-        return berries_coordinates
+        return [b.pos for b in self.berry_index.get_berries(agent_id)]
     
     def get_uneaten_berry_by_coords(self, coords, agent_id=None):
         """
         Get an uneaten berry by its coordinates
         """
-        for b in self.berries:
-            if b.pos == coords and b.foraged == False:
-                if agent_id == None:
-                    return b
-                elif b.allocated_agent_id == agent_id:
-                    return b
-        raise NoBerriesException(coordinates=coords)
+        berry = self.berry_index.get_berry(coords, agent_id)
+        if berry == None:
+            raise NoBerriesException(coordinates=coords)
+        return berry
+
+    def get_nearest_uneaten_berry(self, coords, agent_id=None):
+        """
+        Get the uneaten berry nearest to coordinates (None if there are no uneaten berries)
+        """
+        return self.berry_index.get_nearest_berry(coords, agent_id)
     
     def get_society_well_being(self, observer, include_observer):
         """
-        Get the well-being of a society; iterates over all agents in the society, excluding the observer if the agent is observing
+        Get the well-being of a society in order of agent id, excluding the observer if the agent is observing
         """
-        society_well_being = np.array([])
-        for a in self.schedule.agents:
-            if (a.unique_id == observer.unique_id and not include_observer) or a.agent_type == "berry":
-                continue
-            elif a.done == False:
-                society_well_being = np.append(society_well_being, a.days_left_to_live)
-            elif a.done == True and include_observer:
-                continue
-            else:
-                society_well_being = np.append(society_well_being, 0)
-        return society_well_being
+        return self.agent_state.get_society_well_being(observer.unique_id, include_observer)
     
     def get_num_agents(self):
         return self.num_agents
@@ -172,10 +279,13 @@ class HarvestModel(Model):
     def _init_berries(self):
         raise NotImplementedError
     
+    def _decide_actions(self):
+        decide_actions(self.living_agents)
+
     def _init_agents(self, agent_type, checkpoint_path):
         self.living_agents = []
         for i in range(self.num_agents):
-            a = HarvestAgent(i,self,agent_type,self.max_days,0,self.max_width,0,self.max_height,self.training,checkpoint_path,self.epsilon,self.write_norms,shared_replay_buffer=self.shared_replay_buffer)
+            a = HarvestAgent(i,self,agent_type,self.max_days,0,self.max_width,0,self.max_height,self.training,checkpoint_path,self.epsilon,self.write_norms,shared_replay_buffer=self.shared_replay_buffer,macro_actions=self.macro_actions,learner_pool=self.learner_pool)
             self._add_agent(a)
         self.berry_id = len(self.living_agents) + 1
 
@@ -185,8 +295,11 @@ class HarvestModel(Model):
         if a.agent_type != "berry":
             self.agent_id += 1
             self.living_agents.append(a)
+            if self.training:
+                a.register_checkpoints(self.checkpoint_manager)
 
     def _reset(self):
+        self.layout_rng_state = self.rng.bit_generator.state
         self.living_agents = []
         self.emerged_norms = {}
         self.day = 0
@@ -196,28 +309,16 @@ class HarvestModel(Model):
         self.total_episode_reward = 0
         self._clear_grid()
         for a in self.schedule.agents:
-            if a.agent_type != "berry":
-                self._reset_agent(a)
-                num_agents += 1
-            elif a.agent_type == "berry":
-                self._reset_berry(a, True)
-                num_berries += 1
+            self._reset_agent(a)
+            num_agents += 1
+        for b in self.schedule.berries:
+            self._reset_berry(b, True)
+            num_berries += 1
         if num_agents != self.num_agents:
             raise NumAgentsException(self.num_agents, num_agents)
         if num_berries != self.num_berries:
             raise NumBerriesException(self.num_berries, num_berries)
-        self.agent_reporter = pd.DataFrame({"agent_id": [],
-                               "episode": [],
-                               "day": [],
-                               "berries": [],
-                               "berries_consumed": [],
-                               "berries_thrown": [],
-                               "health": [],
-                               "days_left_to_live": [],
-                               "total_days": [],
-                               "action": [],
-                               "reward": [],
-                               "num_norms": []})
+        self.agent_reporter.clear()
     
     def _reset_agent(self, agent):
         if agent.agent_type == "berry":
@@ -230,116 +331,81 @@ class HarvestModel(Model):
     def _reset_berry(self, berry, end_of_episode):
         if berry.agent_type != "berry":
             raise AgentTypeException("berry", berry.agent_type)
+        self.berry_index.remove(berry)
         if not end_of_episode:
             self.grid.remove_agent(berry)
         berry.reset()
         self._place_agent_in_allotment(berry)
         
     def _init_reporters(self):
-        self.agent_reporter = pd.DataFrame({"agent_id": [],
-                               "episode": [],
-                               "day": [],
-                               "berries": [],
-                               "berries_consumed": [],
-                               "berries_thrown": [],
-                               "health": [],
-                               "days_left_to_live": [],
-                               "total_days": [],
-                               "action": [],
-                               "reward": [],
-                               "num_norms": []})
+        self.agent_reporter = AgentRecorder()
+        self.agent_results = None
+        self.model_episode_results = None
+        if self.write_data or self.write_norms:
+            os.makedirs(self.results_path, exist_ok=True)
         if self.write_data and not self.training:
-           if exists("data/results/current_run/agent_reports_"+self.filepath+".csv"):
-               raise FileExistsException("data/results/current_run/agent_reports_"+self.filepath+".csv")
-           self.agent_reporter.to_csv("data/results/current_run/agent_reports_"+self.filepath+".csv", mode='a')
-        self.model_episode_reporter = pd.DataFrame({"episode": [], 
-                               "end_day": [],
-                               "epsilon": [],
-                               "mean_reward": [],
-                               "mean_loss": [],
-                               "max_berries": [],
-                               "mean_berries": [],
-                               "max_berries_consumed": [],
-                               "mean_berries_consumed": [],
-                               "gini_berries_consumed": [],
-                               "mean_berries_thrown": [],
-                               "max_health": [],
-                               "mean_health": [],
-                               "median_health": [],
-                               "variance_health": [],
-                               "deceased": [],
-                               "num_emerged_norms": []})
+            self.agent_results = self._init_results_writer(self.results_path+"agent_reports_"+self.filepath, AGENT_REPORT_COLUMNS)
         if self.write_data:
-            if exists("data/results/current_run/model_episode_reports_"+self.filepath+".csv"):
-                raise FileExistsException("data/results/current_run/model_episode_reports_"+self.filepath+".csv")
-            self.model_episode_reporter.to_csv("data/results/current_run/model_episode_reports_"+self.filepath+".csv", mode='a')
+            self.model_episode_results = self._init_results_writer(self.results_path+"model_episode_reports_"+self.filepath, MODEL_EPISODE_REPORT_COLUMNS)
+        self.norm_log = None
+        if self.write_norms:
+            self.norm_log = NormLogWriter(self.results_path+self.filepath+"_emerged_norms.jsonl")
+
+    def _init_results_writer(self, filename, columns):
+        writer = ResultsWriter(filename, columns)
+        if self.resume:
+            return writer
+        if exists_report(filename):
+            raise FileExistsException(writer.path)
+        writer.write_header()
+        return writer
+
+    def _checkpoint_reporters(self):
+        #how far each report has been written, for a snapshot
+        positions = {}
+        for name in ("agent_results", "model_episode_results", "norm_log"):
+            reporter = getattr(self, name)
+            if reporter is not None:
+                positions[name] = reporter.checkpoint()
+        return positions
 
     def _collect_agent_data(self, agent):
-        new_entry = pd.DataFrame({"agent_id": [agent.unique_id],
-                               "episode": [self.episode],
-                               "day": [self.day],
-                               "berries": [agent.berries],
-                               "berries_consumed": [agent.berries_consumed],
-                               "berries_thrown": [agent.berries_thrown],
-                               "health": [agent.health],
-                               "days_left_to_live": [agent.days_left_to_live],
-                               "total_days_left_to_live": [agent.total_days_left_to_live],
-                               "action": [agent.current_action],
-                               "reward": [agent.current_reward],
-                               "num_norms": [len(agent.norms_module.behaviour_base) if self.write_norms else None]})
-        self.agent_reporter = pd.concat([self.agent_reporter, new_entry], ignore_index=True)
-        if self.write_data and not self.training:
-           new_entry.to_csv("data/results/current_run/agent_reports_"+self.filepath+".csv", header=None, mode='a')
+        num_norms = agent.norms_module.get_num_behaviours() if self.write_norms else None
+        self.agent_reporter.record(agent.unique_id, self.episode, self.day, agent.berries, agent.berries_consumed, agent.berries_thrown, agent.health, agent.days_left_to_live, agent.total_days_left_to_live, agent.current_action, agent.current_reward, num_norms)
     
     def _collect_model_episode_data(self):
-        row_index_list = self.agent_reporter.index[self.agent_reporter["episode"] == self.episode].tolist()
+        #agent reporter holds only the current episode, so its running statistics are the episode statistics
+        reporter = self.agent_reporter
         new_entry = pd.DataFrame({"episode": [self.episode], 
                                "end_day": [self.day],
                                "epsilon": [self.epsilon],
                                "mean_reward": [self._mean_reward()],
                                "mean_loss": [self._mean_loss()],
-                               "max_berries": [self.agent_reporter["berries"].iloc[row_index_list].max()],
-                               "mean_berries": [self.agent_reporter["berries"].iloc[row_index_list].mean(axis=0)],
-                               "max_berries_consumed": [self.agent_reporter["berries_consumed"].iloc[row_index_list].max()],
-                               "mean_berries_consumed": [self.agent_reporter["berries_consumed"].iloc[row_index_list].mean(axis=0)],
+                               "max_berries": [reporter.get_max("berries")],
+                               "mean_berries": [reporter.get_mean("berries")],
+                               "max_berries_consumed": [reporter.get_max("berries_consumed")],
+                               "mean_berries_consumed": [reporter.get_mean("berries_consumed")],
                                "gini_berries_consumed": [self._gini_berries_consumed()],
-                               "mean_berries_thrown": [self.agent_reporter["berries_thrown"].iloc[row_index_list].mean(axis=0)],
-                               "max_health": [self.agent_reporter["health"].iloc[row_index_list].max()],
-                               "mean_health": [self.agent_reporter["health"].iloc[row_index_list].mean(axis=0)],
-                               "median_health": [self.agent_reporter["health"].iloc[row_index_list].median()],
-                               "variance_health": [self.agent_reporter["health"].iloc[row_index_list].var(axis=0)],
+                               "mean_berries_thrown": [reporter.get_mean("berries_thrown")],
+                               "max_health": [reporter.get_max("health")],
+                               "mean_health": [reporter.get_mean("health")],
+                               "median_health": [reporter.get_median("health")],
+                               "variance_health": [reporter.get_variance("health")],
                                "deceased": [self.num_agents - len(self.living_agents)],
                                "num_emerged_norms": [len(self.emerged_norms) if self.write_norms else None]})
-        if self.write_data:
-            new_entry.to_csv("data/results/current_run/model_episode_reports_"+self.filepath+".csv", header=None, mode='a')
+        if self.model_episode_results is not None:
+            self.model_episode_results.append(new_entry.to_dict("list"))
+            self.model_episode_results.end_episode()
+        if self.agent_results is not None:
+            self.agent_results.append(self.agent_reporter.to_columns())
+            self.agent_results.end_episode()
         return new_entry
 
-    def _append_norm_dict_to_file(self, norm_dictionary, filename):
-        with open(filename, "a+") as file:
-            file.seek(0)
-            if not file.read(1):
-                file.write("{")
-            file.seek(0, 2)
-            norm_list = []
-            for key, value in norm_dictionary.items():
-                dict = {key: value}
-                norm_list.append(dict)
-            file.write(f"\"{self.episode}\": {json.dumps(norm_list, indent=4)}\n")
-            if self.episode != self.max_episodes:
-                file.write(",")
-            else:
-                file.write("}")
-
     def _check_emerged_norms(self):
         if len(self.living_agents) < 2:
             return
         emergence_count = len(self.living_agents) * self.societal_norm_emergence_threshold
-        current_emerged_norms = {}
-        for agent in self.schedule.agents:
-            if agent.agent_type != "berry":
-                for norm_name, norm_value in agent.norms_module.behaviour_base.items():
-                    current_emerged_norms = self._update_norm(norm_name, norm_value, current_emerged_norms)
-        current_emerged_norms = {norm: norm_value for norm, norm_value in current_emerged_norms.items() if norm_value["adoption"] >= emergence_count and norm_value["fitness"] >= self.min_fitness}
+        current_emerged_norms = self.norm_tracker.check(emergence_count, self.min_fitness)
         for norm_name, norm_value in current_emerged_norms.items():
             self.emerged_norms = self._update_norm(norm_name, norm_value, self.emerged_norms)
     
@@ -356,15 +422,15 @@ class HarvestModel(Model):
         return norm_base
     
     def _update_schedule(self):
-        #check for dead agents & foraged berries
+        #check for foraged berries & dead agents
+        for b in self.schedule.berries:
+            if b.foraged == True:
+                self._reset_berry(b, False)
         for a in self.schedule.agents:
-            if a.agent_type == "berry" and a.foraged == True:
-                self._reset_berry(a, False)
-            if a.agent_type != "berry":
-                if a.off_grid == False:
-                    self._collect_agent_data(a)
-                    if a.done == True:
-                        self._remove_agent(a)
+            if a.off_grid == False:
+                self._collect_agent_data(a)
+                if a.done == True:
+                    self._remove_agent(a)
     
     def _check_bounds(self, cell):
         if cell[0] >= 0 and cell[0] < self.max_width:
@@ -378,6 +444,8 @@ class HarvestModel(Model):
             raise NoEmptyCells
         cell = self._random_allotment_cell(agent)
         self.grid.place_agent(agent, cell)
+        if agent.agent_type == "berry":
+            self.berry_index.add(agent)
 
     def _move_agent_in_allotment(self, agent, cell=None):
         #for agents who are on the grid
@@ -389,15 +457,16 @@ class HarvestModel(Model):
     
     def _clear_grid(self):
         for a in self.schedule.agents:
-            if a.agent_type != "berry" and a.off_grid:
-                continue
-            self.grid.remove_agent(a)
+            if not a.off_grid:
+                self.grid.remove_agent(a)
+        for b in self.schedule.berries:
+            self.grid.remove_agent(b)
     
     def _remove_agent(self, agent):
         self.grid.remove_agent(agent)
         agent.off_grid = True
         agent.days_left_to_live = 0
-        self.living_agents = [a for a in self.schedule.agents if a.agent_type != "berry" and a.off_grid == False]
+        self.living_agents = [a for a in self.schedule.agents if a.off_grid == False]
     
     def _new_berry(self,min_width,max_width,min_height,max_height,allocation_id=None):
         berry = Berry(self.berry_id,self,min_width,max_width,min_height,max_height,allocation_id)
@@ -406,8 +475,8 @@ class HarvestModel(Model):
         return berry
     
     def _random_allotment_cell(self, agent):
-        width = np.random.randint(agent.min_width, agent.max_width)
-        height = np.random.randint(agent.min_height, agent.max_height)
+        width = int(self.rng.integers(agent.min_width, agent.max_width))
+        height = int(self.rng.integers(agent.min_height, agent.max_height))
         return (width, height)
     
     def _generate_resource_allocations(self, num_agents):
@@ -423,7 +492,7 @@ class HarvestModel(Model):
     def _gini_berries_consumed(self):
         if len(self.living_agents) == 0:
             return 0
-        berries_consumed = [a.berries_consumed for a in self.schedule.agents if a.agent_type != "berry"]
+        berries_consumed = [a.berries_consumed for a in self.schedule.agents]
         x = sorted(berries_consumed)
         s = sum(x)
         if s == 0:
@@ -436,9 +505,8 @@ class HarvestModel(Model):
         m = 0
         if self.training:
             for agent in self.schedule.agents:
-                if agent.agent_type != "berry":
-                    if len(agent.losses) > 1:
-                        m += np.mean(agent.losses)
+                if len(agent.losses) > 1:
+                    m += np.mean(agent.losses)
             if m == 0:
                 return 0
             m /= self.num_agents
@@ -447,8 +515,7 @@ class HarvestModel(Model):
     def _mean_reward(self):
         m = 0
         for agent in self.schedule.agents:
-            if agent.agent_type != "berry":
-                m += agent.total_episode_reward
+            m += agent.total_episode_reward
         if m == 0:
             return 0
         m /= self.num_agents
@@ -457,9 +524,43 @@ class HarvestModel(Model):
     def _mean_epsilon(self):
         m = 0
         for agent in self.schedule.agents:
-            if agent.agent_type != "berry":
-                m += agent.epsilon
+            m += agent.epsilon
         if m == 0:
             return 0
         m /= self.num_agents
-        return m
\ No newline at end of file
+        return m
+
+def decide_actions(agents):
+    """
+    Batched decision phase: every agent still to choose an action observes the current state, with one forward pass per distinct network
+    """
+    network_groups = {}
+    for a in agents:
+        if a.done == False and not a.has_macro_action():
+            network_groups.setdefault(id(a.q_network.dqn), []).append((a, a.observe()))
+    for group in network_groups.values():
+        q_network = group[0][0].q_network
+        action_values = np.asarray(q_network.predict(np.array([observation for _, observation in group])))
+        for (a, observation), values in zip(group, action_values):
+            a.decide(observation, q_network.choose_action_from_values(values, a.epsilon, a.exploration_rng))
+
+def get_mean_train_step_time(agents):
+    """
+    Get the mean seconds per training step of the distinct q networks of agents (for profiling)
+    """
+    networks = {id(a.q_network): a.q_network for a in agents}.values()
+    train_steps = sum(network.train_steps for network in networks)
+    if train_steps == 0:
+        return 0
+    return sum(network.train_step_time for network in networks) / train_steps
+
+def get_latest_snapshot(directory):
+    """
+    Get the path of the snapshot in a directory taken after the most episodes (None if there is none)
+    """
+    if not os.path.isdir(directory):
+        return None
+    episodes = [int(name[len("episode_"):]) for name in os.listdir(directory) if name.startswith("episode_") and name[len("episode_"):].isdigit()]
+    if not episodes:
+        return None
+    return os.path.join(directory, "episode_"+str(max(episodes)))
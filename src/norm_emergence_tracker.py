@@ -0,0 +1,85 @@
+class NormEmergenceTracker:
+    """
+    Norm emergence tracker maintains which agents have adopted each behaviour, as norms modules create, update and clip behaviours
+    Emergence checks only re-evaluate behaviours which changed since the last check, unless the size of the society has changed
+    Instance variables:
+        adopters -- for each behaviour id, the norms module of every agent which has adopted it, by agent id
+        changed -- behaviours created, updated or clipped since the last check
+        emerged -- behaviours which had emerged as norms at the last check
+        emergence_count -- number of adopters required for a behaviour to emerge at the last check
+    """
+    def __init__(self):
+        self.adopters = {}
+        self.changed = set()
+        self.emerged = {}
+        self.emergence_count = None
+
+    def add(self, agent_id, norm_name, norms_module):
+        """
+        Record that an agent has adopted a behaviour; the agent's metrics of the behaviour are read from its norms module when the norm is checked
+        """
+        self.adopters.setdefault(norm_name, {})[agent_id] = norms_module
+        self.changed.add(norm_name)
+
+    def update(self, norm_name):
+        """
+        Record that an agent's metrics of a behaviour have changed
+        """
+        self.changed.add(norm_name)
+
+    def remove(self, agent_id, norm_name):
+        """
+        Record that an agent has dropped a behaviour
+        """
+        adopters = self.adopters[norm_name]
+        del adopters[agent_id]
+        if not adopters:
+            del self.adopters[norm_name]
+        self.changed.add(norm_name)
+
+    def check(self, emergence_count, min_fitness):
+        """
+        Get the behaviours adopted by at least emergence count agents with a total fitness of at least min fitness, with their reward, numerosity and fitness summed over adopters
+        """
+        if emergence_count != self.emergence_count:
+            candidates = self.changed.union(self.adopters)
+            self.emergence_count = emergence_count
+        else:
+            candidates = self.changed
+        for norm_name in candidates:
+            adopters = self.adopters.get(norm_name)
+            if adopters is not None and len(adopters) >= emergence_count and self._sum(norm_name, adopters, "fitness") >= min_fitness:
+                self.emerged[norm_name] = None
+            else:
+                self.emerged.pop(norm_name, None)
+        self.changed = set()
+        return {norm_name: self._aggregate(norm_name) for norm_name in self.emerged}
+
+    def get_state(self):
+        """
+        Get the changed and emerged behaviours and the last emergence count, for a snapshot taken between episodes (when no behaviours are adopted)
+        """
+        return {"changed": list(self.changed), "emerged": list(self.emerged), "emergence_count": self.emergence_count}
+
+    def set_state(self, state):
+        """
+        Restore the changed and emerged behaviours and the last emergence count from a snapshot, in the order they were held
+        """
+        self.changed = set()
+        for norm_name in state["changed"]:
+            self.changed.add(norm_name)
+        self.emerged = dict.fromkeys(state["emerged"])
+        self.emergence_count = state["emergence_count"]
+
+    def _aggregate(self, norm_name):
+        adopters = self.adopters[norm_name]
+        return {"reward": self._sum(norm_name, adopters, "reward"),
+                "numerosity": self._sum(norm_name, adopters, "numerosity"),
+                "fitness": self._sum(norm_name, adopters, "fitness"),
+                "adoption": len(adopters)}
+
+    def _sum(self, norm_name, adopters, metric):
+        total = 0
+        for norms_module in adopters.values():
+            total += norms_module.get_metric(norm_name, metric)
+        return total
@@ -0,0 +1,69 @@
+BERRIES_TERMS = ("no berries", "low berries", "medium berries", "high berries")
+HEALTH_TERMS = ("low health", "medium health", "high health")
+DAYS_TERMS = ("low days", "medium days", "high days")
+CONSEQUENT_TERMS = ("move", "eat", "throw")
+
+class NormTable:
+    """
+    Norm table interns behaviours across the society, so norms modules store small integer ids rather than strings
+    A behaviour is packed into an integer code with one byte per term: a leading 1, the berries and health terms, a days term for each agent in the society, and the consequent
+    Names (e.g. "IF,no berries,medium health,high days,THEN,move") are only rendered when norms are written to file
+    Instance variables:
+        ids -- id of each interned behaviour code
+        codes -- code of each interned behaviour, by id
+        names -- rendered name of each behaviour, by id
+    """
+    def __init__(self):
+        self.ids = {}
+        self.codes = []
+        self.names = {}
+
+    def __len__(self):
+        return len(self.codes)
+
+    def intern(self, antecedent, consequent):
+        """
+        Get the id of the behaviour with an antecedent code and consequent (index into consequent terms), adding it if it is new
+        """
+        code = (antecedent << 8) | consequent
+        norm_id = self.ids.get(code)
+        if norm_id is None:
+            norm_id = len(self.codes)
+            self.ids[code] = norm_id
+            self.codes.append(code)
+        return norm_id
+
+    def get_state(self):
+        """
+        Get the codes of the interned behaviours in order of id, for a snapshot
+        """
+        return list(self.codes)
+
+    def set_state(self, codes):
+        """
+        Restore the interned behaviours from a snapshot, so behaviours keep their ids
+        """
+        self.codes = list(codes)
+        self.ids = {code: norm_id for norm_id, code in enumerate(self.codes)}
+        self.names = {}
+
+    def get_name(self, norm_id):
+        """
+        Get the name of a behaviour as written in norm files
+        """
+        name = self.names.get(norm_id)
+        if name is None:
+            code = self.codes[norm_id]
+            terms = code.to_bytes((code.bit_length() + 7) // 8, "big")
+            view = ["IF", BERRIES_TERMS[terms[1]], HEALTH_TERMS[terms[2]]]
+            view.extend(DAYS_TERMS[term] for term in terms[3:-1])
+            view.extend(["THEN", CONSEQUENT_TERMS[terms[-1]]])
+            name = ",".join(view)
+            self.names[norm_id] = name
+        return name
+
+    def render(self, norms):
+        """
+        Replace the ids of a dictionary of behaviours with their names
+        """
+        return {self.get_name(norm_id): value for norm_id, value in norms.items()}
@@ -0,0 +1,57 @@
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed
+
+class ParallelRuns:
+    """
+    Parallel runs fan independent runs (e.g. each agent type, scenario and society size) out to a pool of processes
+    Runs share nothing, so each has its own process; processes are started fresh rather than forked, so each imports TensorFlow itself
+    TensorFlow (and OpenMP) in each process is limited to a few threads so that concurrent runs do not oversubscribe cores
+    Instance variables:
+        max_jobs -- most runs at once (None for the number of cores)
+        threads_per_job -- threads each run may use (None for no limit)
+    """
+    def __init__(self, max_jobs=None, threads_per_job=1):
+        self.max_jobs = max_jobs
+        self.threads_per_job = threads_per_job
+
+    def run(self, target, jobs):
+        """
+        Call target(**arguments) in a separate process for each job (dictionary of job name to arguments), reporting progress as runs finish
+        Returns the result of each job by name; if any run fails, the first failure is raised once the other runs have finished
+        """
+        max_jobs = self.max_jobs if self.max_jobs is not None else os.cpu_count()
+        max_jobs = max(1, min(max_jobs, len(jobs)))
+        results = {}
+        error = None
+        start = time.monotonic()
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=max_jobs, mp_context=context, initializer=_limit_threads, initargs=(self.threads_per_job,)) as executor:
+            futures = {executor.submit(_run_job, target, arguments): name for name, arguments in jobs.items()}
+            print("Running",len(jobs),"runs,",max_jobs,"at a time")
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    results[name], seconds = future.result()
+                    print(f"Finished {name} in {seconds:.0f}s ({len(results)}/{len(jobs)} done, {time.monotonic() - start:.0f}s elapsed)")
+                except Exception as e:
+                    print(f"Failed {name}: {e!r}")
+                    if error is None:
+                        error = e
+        if error is not None:
+            raise error
+        return results
+
+def _limit_threads(threads):
+    #runs in each new process before any job, so before TensorFlow is imported
+    if threads is None:
+        return
+    for variable in ("TF_NUM_INTRAOP_THREADS", "TF_NUM_INTEROP_THREADS", "OMP_NUM_THREADS"):
+        os.environ[variable] = str(threads)
+
+def _run_job(target, arguments):
+    start = time.monotonic()
+    result = target(**arguments)
+    return result, time.monotonic() - start
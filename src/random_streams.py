@@ -0,0 +1,30 @@
+import numpy as np
+
+#components of a run which draw random numbers; a stream's key is its component's position here followed by any ids, so adding components does not change existing streams
+COMPONENTS = ("environment", "schedule", "replay", "exploration", "tensorflow", "copies", "shards")
+
+class RandomStreams:
+    """
+    Random streams derive an independent generator for each component of a run from one run seed
+    Runs with the same seed draw the same numbers, and runs with different seeds (e.g. parallel shards or replicates) are statistically independent
+    Each stream is a child of the run's seed sequence keyed by component and ids (e.g. exploration of agent 2), so it does not depend on which other streams are used or in what order
+    Instance variables:
+        seed -- run seed; if none is given, fresh entropy is drawn and recorded here so the run can be repeated
+    """
+    def __init__(self, seed=None):
+        self.seed = np.random.SeedSequence(seed).entropy
+
+    def get_generator(self, component, *ids):
+        """
+        Get the generator of a component's stream (the same stream each time it is asked for)
+        """
+        return np.random.default_rng(self._get_seed_sequence(component, ids))
+
+    def get_seed(self, component, *ids):
+        """
+        Get a 32-bit integer seed from a component's stream, for seeding other libraries and runs
+        """
+        return int(self._get_seed_sequence(component, ids).generate_state(1)[0])
+
+    def _get_seed_sequence(self, component, ids):
+        return np.random.SeedSequence(self.seed, spawn_key=(COMPONENTS.index(component),) + tuple(ids))
@@ -10,8 +10,8 @@ class AllotmentHarvest(HarvestModel):
         allocations -- dictionary of agent ids, the part of the grid they have access to, and the berries assigned to that agent
         berries -- list of active berry objects
     """
-    def __init__(self,num_agents,num_start_berries,agent_type,max_width,max_height,max_episodes,max_days,training,checkpoint_path,write_data,write_norms,filepath=""):
-        super().__init__(num_agents,max_width,max_height,max_episodes,max_days,training,write_data,write_norms,filepath)
+    def __init__(self,num_agents,num_start_berries,agent_type,max_width,max_height,max_episodes,max_days,training,checkpoint_path,write_data,write_norms,filepath="",batch_actions=False,macro_actions=False,learner_pool=None,results_path="data/results/current_run/",seed=None,resume=False):
+        super().__init__(num_agents,max_width,max_height,max_episodes,max_days,training,write_data,write_norms,filepath,batch_actions,macro_actions,learner_pool,results_path,seed,resume)
         self.num_start_berries = num_start_berries
         allotment_interval = int(max_width / num_agents)
         self.allocations = self._assign_allocations(allotment_interval)
@@ -51,7 +51,7 @@ class AllotmentHarvest(HarvestModel):
         for id in range(self.num_agents):
             agent_id = "agent_"+str(id)
             allotment = self.allocations[agent_id]["allotment"]
-            a = HarvestAgent(id,self,agent_type,self.max_days,allotment[0],allotment[1],allotment[2],allotment[3],self.training,checkpoint_path,self.epsilon,self.write_norms,shared_replay_buffer=self.shared_replay_buffer)
+            a = HarvestAgent(id,self,agent_type,self.max_days,allotment[0],allotment[1],allotment[2],allotment[3],self.training,checkpoint_path,self.epsilon,self.write_norms,shared_replay_buffer=self.shared_replay_buffer,macro_actions=self.macro_actions,learner_pool=self.learner_pool)
             self._add_agent(a)
         self.num_living_agents = len(self.living_agents)
         self.berry_id = self.num_living_agents + 1
@@ -9,8 +9,8 @@ class CapabilitiesHarvest(HarvestModel):
         allocations -- dictionary of agent ids and the berries assigned to that agent
         berries -- list of active berry objects
     """
-    def __init__(self,num_agents,num_start_berries,agent_type,max_width,max_height,max_episodes,max_days,training,checkpoint_path,write_data,write_norms,filepath=""):
-        super().__init__(num_agents,max_width,max_height,max_episodes,max_days,training,write_data,write_norms,filepath)
+    def __init__(self,num_agents,num_start_berries,agent_type,max_width,max_height,max_episodes,max_days,training,checkpoint_path,write_data,write_norms,filepath="",batch_actions=False,macro_actions=False,learner_pool=None,results_path="data/results/current_run/",seed=None,resume=False):
+        super().__init__(num_agents,max_width,max_height,max_episodes,max_days,training,write_data,write_norms,filepath,batch_actions,macro_actions,learner_pool,results_path,seed,resume)
         self.num_start_berries = num_start_berries
         self.allocations = self._assign_allocations()
         self._init_agents(agent_type, checkpoint_path)
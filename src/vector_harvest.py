@@ -0,0 +1,79 @@
+import numpy as np
+from .harvest_model import decide_actions
+from .harvest_model import get_mean_train_step_time
+
+class VectorHarvest:
+    """
+    Vector harvest steps copies of a scenario in lockstep, so that one forward pass per network chooses the actions of every agent in every copy
+    Copies should share a learner pool, so the same agent in each copy learns as one network from the experiences of all copies
+    Each copy keeps its own grid, berries and episodes, and resets when its own episode ends; when testing, each copy stops once it has run the maximum number of episodes
+    Actions are always chosen in one batched decision phase per day (agents observe the start of day state)
+    Instance variables:
+        models -- copies of the scenario
+        learner_pool -- networks, replay buffer and checkpoint manager shared by the copies
+        checkpoint_manager -- writes the shared networks to file in the background during training
+        training -- boolean training or testing
+        min_epsilon -- minimum epsilon to end training
+        max_episodes -- maximum number of episodes of each copy (for testing)
+        max_width -- width of grid
+        max_height -- height of grid
+    """
+    def __init__(self, models, learner_pool):
+        self.models = models
+        self.learner_pool = learner_pool
+        self.checkpoint_manager = learner_pool.checkpoint_manager
+        self.training = models[0].training
+        self.min_epsilon = models[0].min_epsilon
+        self.max_episodes = models[0].max_episodes
+        self.max_width = models[0].max_width
+        self.max_height = models[0].max_height
+        for model in self.models:
+            #the vector's decision phase covers every copy, so copies do not run their own
+            model.batch_actions = False
+
+    @property
+    def epsilon(self):
+        """
+        Mean probability of exploration of the copies
+        """
+        return np.mean([model.epsilon for model in self.models])
+
+    @property
+    def episode(self):
+        """
+        Current episode of the copy which has completed the fewest episodes
+        """
+        return min(model.episode for model in self.models)
+
+    @property
+    def schedule(self):
+        """
+        Schedule of the first copy, for rendering
+        """
+        return self.models[0].schedule
+
+    def step(self):
+        """
+        Choose the actions of every agent in every unfinished copy in one decision phase, then step each unfinished copy
+        """
+        models = self._unfinished_models()
+        decide_actions([a for model in models for a in model.living_agents])
+        for model in models:
+            model.step()
+
+    def get_mean_train_step_time(self):
+        """
+        Get the mean seconds per training step of the networks shared by the copies (for profiling)
+        """
+        return get_mean_train_step_time([a for model in self.models for a in model.schedule.agents])
+
+    def close(self):
+        """
+        Write the final checkpoints and any buffered results of every copy to file
+        """
+        for model in self.models:
+            model.close()
+
+    def _unfinished_models(self):
+        #when testing, a copy stops once it has run its own maximum number of episodes, so no copy writes extra episodes while slower copies catch up
+        return [model for model in self.models if model.training or model.episode <= model.max_episodes]
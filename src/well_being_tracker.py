@@ -0,0 +1,63 @@
+import heapq
+
+class WellBeingTracker:
+    """
+    Well-being tracker maintains the well-being (days left to live) of living agents as a counted heap, so the society minimum and its multiplicity are known without rescanning the society
+    Adding or removing a value is O(log N); the minimum and the count of any value are O(1) (amortised over lazily discarded heap entries)
+    Instance variables:
+        counts -- number of living agents with each well-being value
+        heap -- min-heap of well-being values; values whose count has dropped to 0 are discarded lazily
+    """
+    def __init__(self, values=()):
+        self.counts = {}
+        self.heap = []
+        for value in values:
+            self.add(value)
+
+    def __len__(self):
+        return sum(self.counts.values())
+
+    def add(self, value):
+        """
+        Add an agent's well-being
+        """
+        count = self.counts.get(value, 0)
+        if count == 0:
+            heapq.heappush(self.heap, value)
+        self.counts[value] = count + 1
+        #rebuild the heap if discarded values dominate it
+        if len(self.heap) > 2 * len(self.counts) + 16:
+            self.heap = list(self.counts)
+            heapq.heapify(self.heap)
+
+    def remove(self, value):
+        """
+        Remove an agent's well-being
+        """
+        count = self.counts[value] - 1
+        if count == 0:
+            del self.counts[value]
+        else:
+            self.counts[value] = count
+
+    def update(self, old_value, new_value):
+        """
+        Replace an agent's well-being
+        """
+        if old_value != new_value:
+            self.remove(old_value)
+            self.add(new_value)
+
+    def minimum(self):
+        """
+        Get the minimum well-being of the society
+        """
+        while self.heap[0] not in self.counts:
+            heapq.heappop(self.heap)
+        return self.heap[0]
+
+    def count(self, value):
+        """
+        Get the number of agents with a well-being value
+        """
+        return self.counts.get(value, 0)